@@ -14,10 +14,15 @@ PYTHONS = ["3.9"]
 @nox.session(python=PYTHONS)
 def tests(session: Session) -> None:
     """Run the test suite using pytest."""
-    m_args = ["-m", "not e2e"] if "-m" not in session.posargs else []
+    m_args = (
+        ["-m", "not e2e and not benchmark"]
+        if "-m" not in session.posargs
+        else []
+    )
     cov_args = ["--cov"]
     args = [*m_args, *cov_args, *(session.posargs or [])]
-    _install_package(session)
+    # numpy backs the vectorized code paths, which need testing too
+    _install_package(session, "numpy")
     _install_with_constraints(
         session, "coverage[toml]", "pytest", "pytest-cov", "requests-mock"
     )
@@ -95,9 +100,10 @@ def docs(session: Session) -> None:
     session.run("sphinx-build", "docs", "docs/_build")
 
 
-def _install_package(session: Session) -> None:
+def _install_package(session: Session, *extras: str) -> None:
     if not session._runner.global_config.reuse_existing_virtualenvs:
-        session.run("poetry", "install", "--no-dev", external=True)
+        extra_args = [f"--extras={_}" for _ in extras]
+        session.run("poetry", "install", "--no-dev", *extra_args, external=True)
 
 
 def _install_with_constraints(session: Session, *args: str) -> None:
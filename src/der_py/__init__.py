@@ -1,7 +1,17 @@
 """Just a derpy python project."""
-from importlib.metadata import PackageNotFoundError, version  # type: ignore
+from typing import Any
 
-try:
-    __version__ = version(__name__)
-except PackageNotFoundError:  # pragma: no cover
-    __version__ = "unknown"
+
+def __getattr__(name: str) -> Any:
+    """Resolve __version__ on first access, importlib.metadata is slow-ish."""
+    if name != "__version__":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        __version__ = version(__name__)
+    except PackageNotFoundError:  # pragma: no cover
+        __version__ = "unknown"
+    globals()["__version__"] = __version__
+    return __version__
@@ -3,8 +3,7 @@ import textwrap
 
 import click
 
-from der_py.clients import wiki
-from . import __version__
+from der_py.clients import page_buffer, wiki
 
 
 @click.command()
@@ -16,10 +15,112 @@ from . import __version__
     metavar="LANG",
     show_default=True,
 )
-@click.version_option(version=__version__)
-def main(language: str) -> None:
+@click.option(
+    "--count",
+    "-n",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of random pages to fetch",
+    show_default=True,
+)
+@click.option(
+    "--concurrency",
+    "-c",
+    default=4,
+    type=click.IntRange(min=1),
+    help="Number of pages fetched in parallel when --count > 1",
+    show_default=True,
+)
+@click.option(
+    "--buffer/--no-buffer",
+    default=False,
+    help="Print pre-fetched pages from a local buffer, refilled in the"
+    " background",
+    show_default=True,
+)
+@click.option(
+    "--buffer-size",
+    default=page_buffer.BUFFER_SIZE,
+    type=click.IntRange(min=1),
+    help="Max number of pages buffered per language",
+    show_default=True,
+)
+@click.option("--refill-buffer", is_flag=True, default=False, hidden=True)
+@click.option(
+    "--version",
+    is_flag=True,
+    expose_value=False,
+    is_eager=True,
+    callback=lambda ctx, _, value: _print_version(ctx, value),
+    help="Show the version and exit.",
+)
+def main(
+    language: str,
+    count: int,
+    concurrency: int,
+    buffer: bool,
+    buffer_size: int,
+    refill_buffer: bool,
+) -> None:
     """Run der-py, run."""
-    page = wiki.random_page(language=language)
+    if refill_buffer:
+        page_buffer.PageBuffer(
+            page_buffer.default_buffer_path(), buffer_size
+        ).refill(language, concurrency)
+        return
+
+    if buffer:
+        _main_buffered(language, count, concurrency, buffer_size)
+    else:
+        _main_live(language, count, concurrency)
 
+
+def _main_buffered(
+    language: str, count: int, concurrency: int, buffer_size: int
+) -> None:
+    buf = page_buffer.PageBuffer(page_buffer.default_buffer_path(), buffer_size)
+    pages = [_ for _ in (buf.pop(language) for _ in range(count)) if _]
+    for page in pages:
+        _echo_page(page)
+
+    if buf.needs_refill(language):
+        page_buffer.spawn_refill(language, buffer_size)
+
+    if len(pages) < count:
+        _main_live(language, count - len(pages), concurrency)
+
+
+def _main_live(language: str, count: int, concurrency: int) -> None:
+    if count == 1:
+        _echo_page(wiki.random_page(language=language))
+        return
+
+    failed = 0
+    for page in wiki.random_pages(count, language, concurrency):
+        if isinstance(page, click.ClickException):
+            page.show()
+            failed += 1
+        else:
+            _echo_page(page)
+
+    if failed:
+        raise click.ClickException(f"{failed} of {count} page(s) failed")
+
+
+def _print_version(ctx: click.Context, value: bool) -> None:
+    """Like click.version_option, but only resolves the version if asked."""
+    if not value or ctx.resilient_parsing:
+        return
+    from . import __version__
+
+    click.echo(f"{ctx.find_root().info_name}, version {__version__}")
+    ctx.exit()
+
+
+def _echo_page(page: wiki.Page) -> None:
     click.secho(page.title, fg="green")
     click.echo(textwrap.fill(page.extract))
+
+
+if __name__ == "__main__":
+    main(prog_name="derpy")  # pragma: no cover
@@ -1 +1,9 @@
 """Derpy clients."""
+import os
+from pathlib import Path
+
+
+def cache_dir() -> Path:
+    """Directory for on-disk client caches, honoring XDG_CACHE_HOME."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "der-py"
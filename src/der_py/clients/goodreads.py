@@ -1,30 +1,361 @@
-"""Goodreads client."""
+"""Goodreads client.
+
+requests, sqlite3 and concurrent.futures are imported on first use, to keep
+the import of this module cheap.
+"""
 import json
+import logging
 import sys
+import threading
+import time
 from contextlib import suppress
-from typing import Callable, Sequence
+from itertools import islice
+from pathlib import Path
+from types import TracebackType
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+    Set,
+    TYPE_CHECKING,
+    Tuple,
+    Type,
+)
+
+from . import cache_dir
+
+if TYPE_CHECKING:  # pragma: no cover
+    from concurrent.futures import Future
 
-import requests
+    import requests
 
 Ratings = Sequence[int]
 RATINGS_API: str = (
     "https://www.goodreads.com/book/delayable_book_show/{book_id}?page=1"
 )
+RATINGS_MARKER = "renderRatingGraph("
+CHUNK_SIZE = 16 * 1024
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CACHE_TTL: float = 7 * 24 * 3600.0
+CACHE_SIZE: int = 100_000
 
 RatingFetcher = Callable[[int], Ratings]
 
+log = logging.getLogger(__name__)
+
 
 def get_book_ratings(book_id: int) -> Ratings:
     """Fetch ratings for the given book ID."""
     print(f"fetching book ratings for book ID: {book_id}", file=sys.stderr)
-    lines = requests.get(RATINGS_API.format(book_id=book_id)).text.splitlines()
-    idxs = [
-        idx for idx, line in enumerate(lines) if "renderRatingGraph(" in line
-    ]
-    if not idxs:
+    url = RATINGS_API.format(book_id=book_id)
+    import requests
+
+    with requests.get(url, stream=True) as response:
+        return _read_ratings(response, book_id)
+
+
+def _read_ratings(response: "requests.Response", book_id: int) -> Ratings:
+    """Scan the streamed page, stop reading once the ratings are parsed."""
+    counter = _ByteCounter(response.iter_content(CHUNK_SIZE))
+    try:
+        return _parse_ratings(counter.lines())
+    finally:
+        response.close()
+        log.debug("read %d bytes for book ID: %s", counter.total, book_id)
+
+
+def _parse_ratings(lines: Iterable[str]) -> Ratings:
+    l_iter = iter(lines)
+    for line in l_iter:
+        if RATINGS_MARKER in line:
+            break
+    else:
         return []
 
-    with suppress(json.JSONDecodeError):
-        return [int(_) for _ in (json.loads(lines[idxs[0] + 1].strip(" ,")))]
+    with suppress(json.JSONDecodeError, TypeError, ValueError):
+        return [int(_) for _ in json.loads(next(l_iter, "").strip(" ,\r"))]
 
     return []
+
+
+class _ByteCounter:
+    """Split a stream of byte chunks into text lines, counting bytes."""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self.chunks = chunks
+        self.total = 0
+
+    def lines(self) -> Iterator[str]:
+        pending = b""
+        for chunk in self.chunks:
+            self.total += len(chunk)
+            *complete, pending = (pending + chunk).split(b"\n")
+            yield from (_.decode(errors="replace") for _ in complete)
+        if pending:
+            yield pending.decode(errors="replace")
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        """Start with a full bucket."""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._stamp) * self.rate
+                )
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SessionRatingFetcher:
+    """Rating fetcher backed by a pooled, keep-alive HTTP session.
+
+    Implements RatingFetcher, so it can be called for a single book, while
+    `map` fans requests out over at most `concurrency` threads that share
+    the session's connection pool. All requests go through a token-bucket
+    rate limit and transient failures are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        rate: float = 5.0,
+        burst: Optional[int] = None,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 10.0,
+        api: str = RATINGS_API,
+    ) -> None:
+        """Set up the session and the rate limiter."""
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.api = api
+        self.bucket = TokenBucket(rate, burst or concurrency)
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=concurrency, pool_block=True
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __call__(self, book_id: int) -> Ratings:
+        """Fetch ratings for the given book ID, [] if that fails for good.
+
+        A failed book is logged and skipped, like a page without ratings,
+        so that it can't take down a whole batch.
+        """
+        print(f"fetching book ratings for book ID: {book_id}", file=sys.stderr)
+        import requests
+
+        try:
+            return self._fetch(book_id)
+        except requests.RequestException as e:
+            log.warning("giving up on book ID %s: %s", book_id, e)
+            return []
+
+    def _fetch(self, book_id: int) -> Ratings:
+        import requests
+
+        url = self.api.format(book_id=book_id)
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            try:
+                response = self.session.get(
+                    url, timeout=self.timeout, stream=True
+                )
+                if response.status_code not in RETRY_STATUSES:
+                    with response:
+                        response.raise_for_status()
+                        return _read_ratings(response, book_id)
+                response.close()
+                if attempt == self.retries:
+                    response.raise_for_status()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+            time.sleep(self.backoff * 2 ** attempt)
+        return []  # pragma: no cover - the loop either returns or raises
+
+    def map(self, book_ids: Iterable[int]) -> Iterator[Ratings]:
+        """Fetch ratings for many books concurrently, preserving order."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            yield from executor.map(self, book_ids)
+
+    def map_unordered(
+        self, book_ids: Iterable[int]
+    ) -> Iterator[Tuple[int, Ratings]]:
+        """Yield (book ID, ratings) pairs as soon as each fetch completes.
+
+        At most twice `concurrency` requests are in flight or buffered, so
+        memory stays bounded regardless of how many IDs are passed in.
+        """
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        id_iter = iter(book_ids)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+
+            def submit(n: int) -> Set["Future[Tuple[int, Ratings]]"]:
+                return {
+                    executor.submit(lambda _: (_, self(_)), book_id)
+                    for book_id in islice(id_iter, n)
+                }
+
+            pending = submit(2 * self.concurrency)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                pending |= submit(len(done))
+                yield from (_.result() for _ in done)
+
+    def close(self) -> None:
+        """Release pooled connections."""
+        self.session.close()
+
+    def __enter__(self) -> "SessionRatingFetcher":
+        """Use as a context manager."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        """Close the session on the way out."""
+        self.close()
+
+
+def default_cache_path() -> Path:
+    """Location of the ratings cache, honoring XDG_CACHE_HOME."""
+    return cache_dir() / "goodreads-ratings.sqlite3"
+
+
+class RatingCache:
+    """Persistent ratings cache keyed by book ID.
+
+    Entries older than `ttl` seconds count as misses. Once the cache holds
+    more than `max_entries` books, the least recently used ones get evicted.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: float = CACHE_TTL,
+        max_entries: int = CACHE_SIZE,
+    ) -> None:
+        """Open (and create, if needed) the cache database."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        import sqlite3
+
+        self._conn = sqlite3.connect(path.as_posix())
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ratings ("
+                " book_id TEXT PRIMARY KEY,"
+                " ratings TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL"
+                ")"
+            )
+
+    def get_many(self, book_ids: Iterable[int]) -> Dict[str, Ratings]:
+        """Return fresh cached ratings, keyed by the stringified book ID."""
+        keys = [str(_) for _ in book_ids]
+        now = time.time()
+        found: Dict[str, Ratings] = {}
+        for chunk in _chunks(keys, 500):
+            # the IN list only ever holds "?" placeholders
+            rows = self._conn.execute(
+                "SELECT book_id, ratings FROM ratings"  # noqa: S608
+                f" WHERE fetched_at >= ? AND book_id IN ({_marks(chunk)})",
+                (now - self.ttl, *chunk),
+            )
+            found.update((key, json.loads(value)) for key, value in rows)
+
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE ratings SET accessed_at = ? WHERE book_id = ?",
+                ((now, _) for _ in found),
+            )
+        self.hits += len(found)
+        self.misses += len(set(keys)) - len(found)
+        return found
+
+    def put_many(self, ratings: Dict[int, Ratings]) -> None:
+        """Store freshly fetched ratings, then evict if over capacity.
+
+        Empty ratings mean a failed fetch or scrape, so they're not cached.
+        All-zero ones belong to books nobody rated yet, and are.
+        """
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ratings VALUES (?, ?, ?, ?)",
+                (
+                    (str(book_id), json.dumps(list(value)), now, now)
+                    for book_id, value in ratings.items()
+                    if value
+                ),
+            )
+            self._conn.execute(
+                "DELETE FROM ratings WHERE book_id IN ("
+                " SELECT book_id FROM ratings"
+                " ORDER BY accessed_at DESC LIMIT -1 OFFSET ?"
+                ")",
+                (self.max_entries,),
+            )
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        self._conn.close()
+
+    def __enter__(self) -> "RatingCache":
+        """Use as a context manager."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        """Close the database on the way out."""
+        self.close()
+
+
+def _chunks(xs: Sequence[str], size: int) -> Iterator[Sequence[str]]:
+    for start in range(0, len(xs), size):
+        end = start + size
+        yield xs[start:end]
+
+
+def _marks(xs: Sequence[str]) -> str:
+    return ", ".join("?" * len(xs))
@@ -0,0 +1,155 @@
+"""Bounded on-disk buffer of pre-fetched Wikipedia pages.
+
+Pages are queued per language edition in a small SQLite database, so that
+a `derpy` invocation can print one straight away and leave the network
+round trip to a background refill.
+"""
+import json
+import subprocess  # noqa: S404
+import sys
+from contextlib import closing, contextmanager
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterator, List, Optional, TYPE_CHECKING
+
+from . import cache_dir, wiki
+
+if TYPE_CHECKING:  # pragma: no cover
+    import sqlite3
+
+BUFFER_SIZE: int = 20
+
+
+def default_buffer_path() -> Path:
+    """Location of the page buffer, honoring XDG_CACHE_HOME."""
+    return cache_dir() / "wiki-pages.sqlite3"
+
+
+class PageBuffer:
+    """FIFO queue of pages per language, holding at most `capacity` each."""
+
+    def __init__(self, path: Path, capacity: int = BUFFER_SIZE) -> None:
+        """Open (and create, if needed) the buffer database."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.capacity = capacity
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " language TEXT NOT NULL,"
+                " page TEXT NOT NULL"
+                ")"
+            )
+
+    def pop(self, language: str) -> Optional[wiki.Page]:
+        """Take the oldest buffered page, None if the buffer is empty."""
+        with closing(self._connect()) as conn, conn:
+            # take the write lock upfront, so concurrent pops can't race
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, page FROM pages WHERE language = ?"
+                " ORDER BY id LIMIT 1",
+                (language,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM pages WHERE id = ?", (row[0],))
+        return wiki.Page(**json.loads(row[1]))
+
+    def push(self, language: str, pages: List[wiki.Page]) -> None:
+        """Queue pages, dropping the oldest ones beyond capacity."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO pages (language, page) VALUES (?, ?)",
+                ((language, json.dumps(asdict(_))) for _ in pages),
+            )
+            conn.execute(
+                "DELETE FROM pages WHERE language = ? AND id NOT IN ("
+                " SELECT id FROM pages WHERE language = ?"
+                " ORDER BY id DESC LIMIT ?"
+                ")",
+                (language, language, self.capacity),
+            )
+
+    def size(self, language: str) -> int:
+        """Count the pages buffered for the given language."""
+        with closing(self._connect()) as conn:
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM pages WHERE language = ?", (language,)
+            ).fetchone()
+        return count
+
+    def refill(self, language: str, concurrency: int = 4) -> int:
+        """Fetch pages until the buffer is full. Return how many were added.
+
+        Failed fetches are skipped, the next refill will try again. So is
+        the whole refill while another process is running one.
+        """
+        with _refill_lock(self.path) as locked:
+            missing = self.capacity - self.size(language)
+            if not locked or missing <= 0:
+                return 0
+            pages = [
+                _
+                for _ in wiki.random_pages(missing, language, concurrency)
+                if isinstance(_, wiki.Page)
+            ]
+            self.push(language, pages)
+        return len(pages)
+
+    def needs_refill(self, language: str) -> bool:
+        """Check whether the buffer dropped below half its capacity."""
+        return self.size(language) * 2 < self.capacity
+
+    def _connect(self) -> "sqlite3.Connection":
+        import sqlite3
+
+        return sqlite3.connect(
+            self.path.as_posix(), timeout=30, isolation_level=None
+        )
+
+
+def spawn_refill(language: str, capacity: int) -> None:
+    """Refill the buffer from a detached `derpy` process, unless one is."""
+    with _refill_lock(default_buffer_path()) as locked:
+        if not locked:
+            return
+    subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "der_py",
+            "--refill-buffer",
+            f"--language={language}",
+            f"--buffer-size={capacity}",
+        ],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+@contextmanager
+def _refill_lock(path: Path) -> Iterator[bool]:
+    """Try to take the exclusive refill lock of a buffer, without blocking.
+
+    Yields whether it was taken. The lock lives on a file next to the
+    buffer and is released on exit, or by the OS should its holder die.
+    Without fcntl (i.e. off POSIX) there's no locking, it's always taken.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        yield True
+        return
+
+    with open(path.with_name(f"{path.name}.refill-lock"), "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+        else:
+            yield True
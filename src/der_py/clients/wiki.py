@@ -1,16 +1,26 @@
-"""Client for the Wikipedia REST API."""
+"""Client for the Wikipedia REST API.
+
+requests, desert, marshmallow and concurrent.futures are imported on first
+use, so that merely importing this module (e.g. for `derpy --help`) stays
+cheap. Simple models like Page are loaded through a compiled loader and skip
+marshmallow entirely, unless validation fails.
+"""
 from dataclasses import dataclass
 from functools import lru_cache
-from typing import Type
+from typing import Callable, Iterator, TYPE_CHECKING, Type, Union
 
 import click
-import requests
-from desert import schema
-from marshmallow import EXCLUDE, Schema, ValidationError
+
+from ..codegen.loader import CompiledLoader, compile_loader
+
+if TYPE_CHECKING:  # pragma: no cover
+    import requests
+    from marshmallow import Schema
 
 API_URL: str = (
     "https://{language}.wikipedia.org/api/rest_v1/page/random/summary"
 )
+TIMEOUT: float = 10.0
 
 
 @dataclass(frozen=True)
@@ -30,8 +40,48 @@ def random_page(language: str = "en") -> Page:
         >>> bool(page.title)
         True
     """
+    import requests
+
+    return _fetch_page(requests.get, language)
+
+
+def random_pages(
+    n: int, language: str = "en", concurrency: int = 4
+) -> Iterator[Union[Page, click.ClickException]]:
+    """Fetch n random pages concurrently over a shared session.
+
+    Pages are yielded as they arrive. A failed fetch doesn't abort the
+    batch: its ClickException is yielded in place of the page.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_maxsize=concurrency)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(_fetch_page, session.get, language)
+                for _ in range(n)
+            ]
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except click.ClickException as err:
+                    yield err
+
+
+def _fetch_page(get: Callable[..., "requests.Response"], language: str) -> Page:
+    import requests
+    from marshmallow import ValidationError
+
     try:
-        with requests.get(API_URL.format(language=language)) as response:
+        with get(
+            API_URL.format(language=language), timeout=TIMEOUT
+        ) as response:
             response.raise_for_status()
             return _schema(of=Page).load(response.json())
     except (requests.RequestException, ValidationError) as err:
@@ -39,5 +89,13 @@ def random_page(language: str = "en") -> Page:
 
 
 @lru_cache(maxsize=64)
-def _schema(of: Type) -> Schema:
+def _schema(of: Type) -> Union["Schema", CompiledLoader]:
+    """Loader for the type: compiled if simple enough, marshmallow if not."""
+    compiled = compile_loader(of)
+    if compiled is not None:
+        return compiled
+
+    from desert import schema
+    from marshmallow import EXCLUDE
+
     return schema(of, meta={"unknown": EXCLUDE})
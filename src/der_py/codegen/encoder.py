@@ -1,10 +1,28 @@
 """Derpy JSON encoder."""
+import dataclasses
 import datetime
+import decimal
 import json
+import uuid
 from enum import Enum
 from functools import partial
 from json import JSONEncoder
-from typing import Any, Protocol, Union, runtime_checkable
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    TextIO,
+    Type,
+    Union,
+    runtime_checkable,
+)
+
+Handler = Callable[[Any], Any]
+CHUNK_SIZE = 64 * 1024
 
 
 @runtime_checkable
@@ -19,24 +37,131 @@ class IntoDict(Protocol):
         """Conversion method."""
 
 
+def _into_dict(obj: IntoDict) -> dict:
+    return obj.dict()
+
+
+def _isoformat(obj: Union[datetime.date, datetime.time]) -> str:
+    return obj.isoformat()
+
+
+def _as_dict(obj: Any) -> dict:
+    return dataclasses.asdict(obj)
+
+
 class Encoder(JSONEncoder):
     """Encode operations for common types.
 
     Extend this class to provide your own representation for certain field
-    types not normally handled by JSON.
+    types not normally handled by JSON, either by overriding `default` or
+    by registering a handler for the type:
+
+        >>> import decimal
+        >>> class MyEncoder(Encoder): ...
+        >>> MyEncoder.register(decimal.Decimal, float)
+
+    Handlers are looked up once per concrete type (walking the MRO, so
+    registering a base class covers its subclasses) and cached, avoiding
+    an isinstance chain for every encoded object.
     """
 
+    _handlers: ClassVar[Dict[Type, Handler]] = {
+        Enum: str,
+        datetime.timedelta: str,
+        datetime.datetime: _isoformat,
+        datetime.date: _isoformat,
+        datetime.time: _isoformat,
+        decimal.Decimal: str,
+        uuid.UUID: str,
+    }
+    _dispatch: ClassVar[Dict[Type, Optional[Handler]]] = {}
+
+    @classmethod
+    def register(cls, type_: Type, handler: Handler) -> None:
+        """Encode instances of the given type (and subclasses) via handler.
+
+        Registering on a subclass doesn't affect its parents.
+        """
+        if "_handlers" not in cls.__dict__:
+            cls._handlers = {}
+        cls._handlers[type_] = handler
+        cls._invalidate()
+
+    @classmethod
+    def _invalidate(cls) -> None:
+        cls._dispatch = {}
+        for subclass in cls.__subclasses__():
+            subclass._invalidate()
+
+    @classmethod
+    def resolve(cls, type_: Type) -> Optional[Handler]:
+        """Return the handler for the given type, None if there's none."""
+        if "_dispatch" not in cls.__dict__:
+            cls._dispatch = {}
+        try:
+            return cls._dispatch[type_]
+        except KeyError:
+            handler = cls._dispatch[type_] = cls._find_handler(type_)
+            return handler
+
+    @classmethod
+    def _find_handler(cls, type_: Type) -> Optional[Handler]:
+        # same precedence as the protocol check used to have: "dictables"
+        # first, then registered types (closest base first), then dataclasses
+        if callable(getattr(type_, "dict", None)):
+            return _into_dict
+        registries = [
+            _.__dict__["_handlers"]
+            for _ in cls.__mro__
+            if "_handlers" in _.__dict__
+        ]
+        for base in type_.__mro__:
+            for handlers in registries:
+                if base in handlers:
+                    return handlers[base]
+        if dataclasses.is_dataclass(type_):
+            return _as_dict
+        return None
+
     # pylint: disable=method-hidden
-    def default(self, obj: Any) -> Union[dict, str]:
+    def default(self, obj: Any) -> Any:
         """Extend default encoder support with various field types."""
-        if isinstance(obj, IntoDict):
-            return obj.dict()
-        if isinstance(obj, Enum):
-            return str(obj)
-        if isinstance(obj, datetime.timedelta):
-            return str(obj)
+        handler = self.resolve(type(obj))
+        if handler is not None:
+            return handler(obj)
         # Let the base class default method raise the TypeError
         return JSONEncoder.default(self, obj)
 
 
 DUMP = partial(json.dumps, indent=2, sort_keys=True, cls=Encoder)
+
+
+def dump_to(
+    fp: TextIO,
+    obj: Any,
+    compact: bool = False,
+    cls: Type[JSONEncoder] = Encoder,
+    chunk_size: int = CHUNK_SIZE,
+) -> None:
+    """Stream the JSON encoding of obj into fp, like DUMP but incrementally.
+
+    The document is never held in memory as a whole: encoded pieces are
+    buffered and written out whenever about `chunk_size` characters piled
+    up. With `compact`, no whitespace at all is emitted.
+    """
+    if compact:
+        encoder = cls(sort_keys=True, separators=(",", ":"))
+    else:
+        encoder = cls(sort_keys=True, indent=2)
+
+    pending: List[str] = []
+    size = 0
+    for piece in encoder.iterencode(obj):
+        pending.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            fp.write("".join(pending))
+            pending.clear()
+            size = 0
+    if pending:
+        fp.write("".join(pending))
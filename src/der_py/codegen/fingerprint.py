@@ -0,0 +1,202 @@
+"""Fingerprints of canonical object representations.
+
+Hashes what `repr_object` would produce, without materializing it: every
+mapping is reduced to a blake2b digest over its keys and the digests of its
+values as soon as it's been walked. The digests form a Merkle tree, so two
+trees can be diffed down to the subtrees that actually changed.
+"""
+from hashlib import blake2b
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple, Union
+
+from .encoder import IntoDict
+from .representation import fold_object
+
+DIGEST_SIZE = 20
+
+Path = Tuple[Any, ...]
+
+
+class Digest:
+    """Merkle digest of a represented value.
+
+    Mappings have a child digest per (represented) key, other values none.
+    """
+
+    __slots__ = ("digest", "children")
+
+    def __init__(self, digest: bytes, children: Dict[Any, "Digest"]) -> None:
+        """Hold the digest and those of the children."""
+        self.digest = digest
+        self.children = children
+
+    def hex(self) -> str:
+        """Hex encoded digest."""
+        return self.digest.hex()
+
+    def __repr__(self) -> str:
+        """Show the digest and the child keys."""
+        return f"<Digest {self.hex()} children={list(self.children)}>"
+
+
+def fingerprint(o: Union[object, IntoDict]) -> str:
+    """Hex digest of the canonical representation of an object.
+
+    Same as the root of `digest_tree`, without keeping the tree around.
+    """
+    return fold_object(o, _Digester().mapping).hex()
+
+
+def digest_tree(o: Union[object, IntoDict]) -> Digest:
+    """Merkle tree of digests of the canonical representation of an object."""
+    digester = _Digester()
+
+    def assemble(represented: Dict[Any, Any]) -> Digest:
+        children = {
+            key: value
+            if isinstance(value, Digest)
+            else Digest(digester.leaf(value), {})
+            for key, value in represented.items()
+        }
+        digests = {key: child.digest for key, child in children.items()}
+        return Digest(digester.mapping(digests), children)
+
+    return fold_object(o, assemble)
+
+
+def diff(a: Digest, b: Digest) -> Iterator[Path]:
+    """Yield the key paths of the smallest subtrees that differ.
+
+    Subtrees with equal digests are skipped without looking inside them.
+    """
+    stack: List[Tuple[Path, Digest, Digest]] = [((), a, b)]
+    while stack:
+        path, left, right = stack.pop()
+        if left.digest == right.digest:
+            continue
+        if not (left.children and right.children):
+            yield path
+            continue
+
+        keys = list(left.children)
+        keys += [_ for _ in right.children if _ not in left.children]
+        nested = [
+            (path + (key,), left.children[key], right.children[key])
+            for key in keys
+            if key in left.children and key in right.children
+        ]
+        unmatched = [
+            path + (key,)
+            for key in keys
+            if key not in left.children or key not in right.children
+        ]
+        if not unmatched and all(_[1].digest == _[2].digest for _ in nested):
+            # same entries, in a different order
+            yield path
+            continue
+        yield from unmatched
+        stack.extend(reversed(nested))
+
+
+class _Digester:
+    """Hashes represented values, recursing into the items of iterables.
+
+    `repr_object` keeps the items of lists, sets and the like as they are,
+    so they're hashed by structure rather than by their repr: dicts and
+    sets regardless of their order, objects through their own canonical
+    representation.
+    """
+
+    def __init__(self) -> None:
+        # ids of the containers being hashed, to detect cycles
+        self._active: Set[int] = set()
+
+    def mapping(self, represented: Dict[Any, Any]) -> bytes:
+        """Hash a mapping whose children are already reduced to digests.
+
+        Leaves are never bytes (base types are represented as strings), so
+        bytes can only be the digest of a child mapping.
+        """
+        hasher = blake2b(b"{", digest_size=DIGEST_SIZE)
+        for key, value in represented.items():
+            _feed(hasher, key)
+            hasher.update(
+                value if isinstance(value, bytes) else self.leaf(value)
+            )
+        return hasher.digest()
+
+    def leaf(self, value: Any) -> bytes:
+        """Hash a represented leaf: a string, or a tuple/list of items."""
+        hasher = blake2b(b"=", digest_size=DIGEST_SIZE)
+        if isinstance(value, (list, tuple)):
+            # ranges are represented as lists, other iterables as tuples
+            kind = b"[" if isinstance(value, list) else b"("
+            self._feed_items(hasher, kind, value)
+        else:
+            _feed(hasher, value)
+        return hasher.digest()
+
+    def item(self, value: Any) -> bytes:
+        """Hash an item of an iterable, as it is."""
+        hasher = blake2b(b"~", digest_size=DIGEST_SIZE)
+        if isinstance(value, str) or type(value) is int:
+            _feed(hasher, value)
+            return hasher.digest()
+        if id(value) in self._active:
+            raise ValueError("Circular reference detected")
+        self._active.add(id(value))
+        try:
+            self._feed_item(hasher, value)
+        finally:
+            self._active.discard(id(value))
+        return hasher.digest()
+
+    def _feed_item(self, hasher: blake2b, value: Any) -> None:
+        if isinstance(value, dict):
+            entries = (
+                self.item(key) + self.item(item) for key, item in value.items()
+            )
+            _feed_digests(hasher, b"d", sorted(entries))
+        elif isinstance(value, (list, tuple)):
+            kind = b"[" if isinstance(value, list) else b"("
+            self._feed_items(hasher, kind, value)
+        elif isinstance(value, (set, frozenset)):
+            _feed_digests(hasher, b"<", sorted(map(self.item, value)))
+        elif _has_state(value):
+            hasher.update(b"o" + fold_object(value, self.mapping))
+        elif type(value).__repr__ is object.__repr__:
+            # the default repr holds the address, only the type is stable
+            _feed(
+                hasher, f"{type(value).__module__}.{type(value).__qualname__}"
+            )
+        else:
+            _feed(hasher, value)
+
+    def _feed_items(
+        self, hasher: blake2b, kind: bytes, items: Iterable[Any]
+    ) -> None:
+        _feed_digests(hasher, kind, [self.item(_) for _ in items])
+
+
+def _has_state(value: Any) -> bool:
+    """Check for what `repr_object` can represent: dict() or __dict__."""
+    if isinstance(value, IntoDict):
+        return True
+    return isinstance(getattr(value, "__dict__", None), dict)
+
+
+def _feed_digests(hasher: blake2b, kind: bytes, digests: List[bytes]) -> None:
+    hasher.update(b"%s%d:" % (kind, len(digests)))
+    for digest in digests:
+        hasher.update(digest)
+
+
+def _feed(hasher: blake2b, value: Any) -> None:
+    """Hash a scalar, length-prefixed so that values can't run together."""
+    if isinstance(value, str):
+        tag = b"s"
+    elif type(value) is int:
+        tag, value = b"i", str(value)
+    else:
+        tag, value = b"r", repr(value)
+    data = value.encode("utf-8", errors="surrogatepass")
+    hasher.update(b"%s%d:%s" % (tag, len(data), data))
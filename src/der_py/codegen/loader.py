@@ -0,0 +1,149 @@
+"""Compiled loaders for simple dataclasses.
+
+A drop-in for `desert.schema(cls, meta={"unknown": EXCLUDE}).load` that
+generates and compiles a specialized `load` function once per type. Only
+dataclasses whose fields are all plain `str` are supported, which keeps the
+error semantics identical to marshmallow's: same messages, same
+`ValidationError` (imported only when actually raising).
+"""
+import dataclasses
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Optional, Type
+
+MISSING_MSG = "Missing data for required field."
+NULL_MSG = "Field may not be null."
+INVALID_MSG = "Not a valid string."
+INVALID_UTF8_MSG = "Not a valid utf-8 string."
+INVALID_INPUT_MSG = "Invalid input type."
+
+_MISSING = object()
+_LOADERS: Dict[Type, Optional["CompiledLoader"]] = {}
+
+
+class CompiledLoader:
+    """Loader compiled for a single dataclass type."""
+
+    def __init__(
+        self, of: Type, load: Callable[[Any], Any], source: str
+    ) -> None:
+        """Wrap the generated load function."""
+        self.of = of
+        self.load = load
+        self.source = source
+
+    def __repr__(self) -> str:
+        """Show which type this loader was compiled for."""
+        return f"<CompiledLoader of={self.of.__qualname__}>"
+
+
+def compile_loader(of: Type) -> Optional[CompiledLoader]:
+    """Compile a loader for the dataclass, None if it isn't simple enough.
+
+    Loaders are compiled once per type and cached.
+    """
+    if of not in _LOADERS:
+        _LOADERS[of] = _compile(of)
+    return _LOADERS[of]
+
+
+def _compile(of: Type) -> Optional[CompiledLoader]:
+    fields = _simple_fields(of)
+    if fields is None:
+        return None
+
+    source = _generate(fields)
+    namespace: Dict[str, Any] = {
+        "_cls": of,
+        "_Mapping": Mapping,
+        "_MISSING": _MISSING,
+        "_str_error": _str_error,
+        "_raise": _raise,
+        **{
+            f"_default_{_.name}": _.default_factory
+            for _ in fields
+            if _has_default_factory(_)
+        },
+        **{
+            f"_value_{_.name}": _.default
+            for _ in fields
+            if _.default is not dataclasses.MISSING
+        },
+    }
+    code = compile(source, f"<loader of {of.__qualname__}>", "exec")
+    exec(code, namespace)  # noqa: S102
+    return CompiledLoader(of, namespace["load"], source)
+
+
+def _simple_fields(of: Type) -> Optional[List[dataclasses.Field]]:
+    if not dataclasses.is_dataclass(of) or not isinstance(of, type):
+        return None
+
+    fields = dataclasses.fields(of)
+    for field in fields:
+        if field.type not in (str, "str") or not field.init:
+            return None
+        if field.default is None or not field.name.isidentifier():
+            return None
+    return list(fields)
+
+
+def _generate(fields: List[dataclasses.Field]) -> str:
+    lines = [
+        "def load(data):",
+        "    if not isinstance(data, _Mapping):",
+        f"        _raise({{'_schema': [{INVALID_INPUT_MSG!r}]}}, data, {{}})",
+        "    errors = {}",
+        "    valid = {}",
+        "    defaults = {}",
+    ]
+    for field in fields:
+        name = field.name
+        if _has_default_factory(field):
+            on_missing = f"defaults[{name!r}] = _default_{name}()"
+        elif field.default is not dataclasses.MISSING:
+            on_missing = f"defaults[{name!r}] = _value_{name}"
+        else:
+            on_missing = f"errors[{name!r}] = [{MISSING_MSG!r}]"
+        lines += [
+            f"    v = data.get({name!r}, _MISSING)",
+            "    if v is _MISSING:",
+            f"        {on_missing}",
+            "    elif v is None:",
+            f"        errors[{name!r}] = [{NULL_MSG!r}]",
+            "    elif isinstance(v, str):",
+            f"        valid[{name!r}] = v",
+            "    else:",
+            "        v, error = _str_error(v)",
+            "        if error:",
+            f"            errors[{name!r}] = [error]",
+            "        else:",
+            f"            valid[{name!r}] = v",
+        ]
+    lines += [
+        "    if errors:",
+        "        _raise(errors, data, valid)",
+        "    return _cls(**valid, **defaults)",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _str_error(value: Any) -> Any:
+    """Coerce a non-str value like marshmallow's String field would."""
+    if not isinstance(value, bytes):
+        return value, INVALID_MSG
+    try:
+        return value.decode("utf-8"), None
+    except UnicodeDecodeError:
+        return value, INVALID_UTF8_MSG
+
+
+def _raise(errors: Dict[str, List[str]], data: Any, valid: dict) -> None:
+    from marshmallow import ValidationError
+
+    raise ValidationError(errors, data=data, valid_data=valid)
+
+
+def _has_default_factory(field: dataclasses.Field) -> bool:
+    # typed as object: mypy mistakes the callable attribute for a method
+    factory: object = getattr(field, "default_factory")  # noqa: B009
+    return factory is not dataclasses.MISSING
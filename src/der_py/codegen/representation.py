@@ -6,8 +6,21 @@ code-generated Python files.
 
 from collections.abc import Sequence
 from datetime import timedelta
-from functools import partial
-from typing import Any, Callable, Dict, Iterable, Type, Union
+from operator import itemgetter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from .encoder import IntoDict
 
@@ -20,6 +33,27 @@ INTERESTING_TYPES = BASE_TYPES | ITERABLE_TYPES | MAPPING_TYPES | OBJECT_TYPES
 
 Jsonable = Union[str, list, dict, tuple]
 
+_MAPPING, _BASE, _ITERABLE, _OBJECT = range(4)
+_CATEGORY_TYPES = {
+    _MAPPING: tuple(MAPPING_TYPES),
+    _BASE: tuple(BASE_TYPES),
+    _ITERABLE: tuple(ITERABLE_TYPES),
+}
+_CATEGORIES: Dict[Type, Tuple[int, ...]] = {}
+
+NodeKey = Tuple[int, int]
+Groups = List[List[Tuple[Any, Any]]]
+R = TypeVar("R")
+
+
+class _Node(NamedTuple):
+    key: NodeKey
+    node: Any
+    mapping: Dict[Any, Any]
+
+
+Memo = Dict[NodeKey, Tuple[_Node, Any]]
+
 
 def is_interesting(t: Type) -> bool:
     """Return True if we're dealing with an interesting type."""
@@ -27,23 +61,117 @@ def is_interesting(t: Type) -> bool:
 
 
 def repr_object(o: Union[object, IntoDict]) -> Jsonable:
-    """Canonical representation of an object."""
-    if isinstance(o, IntoDict):
-        return _repr_mapping(o.dict())
-    return _repr_mapping(o.__dict__)
+    """Canonical representation of an object.
+
+    The object graph is walked with an explicit stack, so deep graphs don't
+    hit the recursion limit. Shared sub-objects are only represented once
+    (and share their representation), cycles raise a ValueError.
+    """
+    return fold_object(o, _as_is)
 
 
-def _repr_mapping(m: Dict[str, Any]) -> Jsonable:
-    """Represent a mapping recursively."""
-    interesting = {k: v for k, v in m.items() if is_interesting(type(v))}
-    hasher = partial(_repr_type, items=interesting)
+def fold_object(o: Union[object, IntoDict], assemble: Callable[[dict], R]) -> R:
+    """Reduce the canonical representation of an object, bottom up.
 
-    return {
-        **hasher(_type_filter(MAPPING_TYPES), _repr_mapping),
-        **hasher(_type_filter(BASE_TYPES), _repr_base),
-        **hasher(_type_filter(ITERABLE_TYPES), _repr_iterable),
-        **hasher(_type_filter(OBJECT_TYPES), repr_object),
-    }
+    Walks the object graph like `repr_object`, but every represented mapping
+    is passed through `assemble` (holding what `assemble` returned for its
+    children), and the root's result is returned.
+    """
+    return _walk(_root(o), assemble)
+
+
+def _root(o: Union[object, IntoDict]) -> _Node:
+    if isinstance(o, IntoDict):
+        return _Node((id(o), _OBJECT), o, o.dict())
+    return _Node((id(o.__dict__), _MAPPING), o.__dict__, o.__dict__)
+
+
+def _as_is(represented: dict) -> dict:
+    return represented
+
+
+def _is_dictable(x: Any) -> bool:
+    # what isinstance(x, IntoDict) checks, minus the protocol machinery
+    return getattr(x, "dict", None) is not None
+
+
+def _categories(x: Any) -> Tuple[int, ...]:
+    """Categories x falls in, in the order they get represented."""
+    t = type(x)
+    try:
+        categories = _CATEGORIES[t]
+    except KeyError:
+        categories = _CATEGORIES[t] = tuple(
+            category
+            for category, types in _CATEGORY_TYPES.items()
+            if is_interesting(t) and issubclass(t, types)
+        )
+    if _is_dictable(x) and is_interesting(t):
+        return categories + (_OBJECT,)
+    return categories
+
+
+def _group(mapping: Dict[Any, Any]) -> Groups:
+    """Sort the items of a mapping into their categories, sorted by key."""
+    groups: Groups = [[], [], [], []]
+    for item in mapping.items():
+        for category in _categories(item[1]):
+            groups[category].append(item)
+    for group in groups:
+        group.sort(key=itemgetter(0))
+    return groups
+
+
+def _walk(root: _Node, assemble: Callable[[dict], R]) -> R:
+    """Represent the root mapping, children first, without recursing.
+
+    Each mapping's representation (holding the already assembled results
+    of its children) is passed through `assemble`, and that's what ends
+    up in the parent.
+    """
+    # memoized nodes are kept alive, so their ids can't get reused
+    memo: Memo = {}
+    ancestors: Set[NodeKey] = set()
+    stack: List[Tuple[_Node, Optional[Groups]]] = [(root, None)]
+    while stack:
+        node, groups = stack.pop()
+        if groups is not None:
+            memo[node.key] = (node, assemble(_assemble(groups, memo)))
+            ancestors.discard(node.key)
+            continue
+        if node.key in memo:
+            continue
+
+        groups = _group(node.mapping)
+        ancestors.add(node.key)
+        stack.append((node, groups))
+        for child in _children(groups, memo):
+            if child.key in ancestors:
+                raise ValueError("Circular reference detected")
+            stack.append((child, None))
+    return memo[root.key][1]
+
+
+def _children(groups: Groups, memo: Memo) -> Iterator[_Node]:
+    for _, value in groups[_MAPPING]:
+        if (id(value), _MAPPING) not in memo:
+            yield _Node((id(value), _MAPPING), value, value)
+    for _, value in groups[_OBJECT]:
+        if (id(value), _OBJECT) not in memo:
+            yield _Node((id(value), _OBJECT), value, value.dict())
+
+
+def _assemble(groups: Groups, memo: Memo) -> dict:
+    represented: dict = {}
+    for key, value in groups[_MAPPING]:
+        represented[key] = memo[(id(value), _MAPPING)][1]
+    for key, value in groups[_BASE]:
+        represented[key] = _repr_base(value)
+    for key, value in groups[_ITERABLE]:
+        represented[key] = _repr_iterable(value)
+    for key, value in groups[_OBJECT]:
+        represented[key] = memo[(id(value), _OBJECT)][1]
+    return represented
 
 
 def _repr_base(
@@ -58,14 +186,3 @@ def _repr_base(
 def _repr_iterable(xs: Union[list, tuple, set, frozenset]) -> Jsonable:
     """Represent a supported iterable."""
     return tuple(xs) if isinstance(xs, Sequence) else tuple(sorted(xs))
-
-
-def _repr_type(
-    _filter: Callable[[Any], bool], reprer: Callable, items: Dict[str, Any]
-) -> dict:
-    _keys = sorted(k for k, v in items.items() if _filter(v))
-    return {k: reprer(items[k]) for k in _keys}
-
-
-def _type_filter(types: Iterable[Type]) -> Callable[[Any], bool]:
-    return lambda _: isinstance(_, tuple(types))
@@ -1,7 +1,6 @@
 """Derpy fun: higher-order functions and other shenanigans."""
 from collections import defaultdict
 from contextlib import suppress
-from functools import reduce
 from itertools import tee
 from typing import (
     Any,
@@ -23,6 +22,8 @@ B = TypeVar("B")
 K = TypeVar("K")
 V = TypeVar("V", bound=Hashable)
 
+_NO_INITIAL = object()
+
 
 def flatmap(f: Callable[[A], Iterable[B]], xs: Iterable[A]) -> Iterable[B]:
     """Map f over an iterable and flatten the result set."""
@@ -52,6 +53,30 @@ def key_by(f: Callable[[A], K], xs: Iterable[A]) -> DefaultDict[K, List[A]]:
     return d
 
 
+def reduce_by(
+    f: Callable[[A], K],
+    fold: Callable[[B, A], B],
+    xs: Iterable[A],
+    initial: Any = _NO_INITIAL,
+) -> Dict[K, B]:
+    """Group seq after key, folding each group instead of collecting it.
+
+    Like functools.reduce per group: without an initial value, the first
+    item of a group is its starting accumulator. The initial value is
+    shared by all groups, so it shouldn't be mutated by fold.
+    """
+    d: Dict[K, Any] = {}
+    for it in xs:
+        k = f(it)
+        if k in d:
+            d[k] = fold(d[k], it)
+        elif initial is _NO_INITIAL:
+            d[k] = it
+        else:
+            d[k] = fold(initial, it)
+    return d
+
+
 def split_by(
     f: Callable[[A], bool],
     xs: Iterable[A],
@@ -96,5 +121,30 @@ def pairwise(iterable: Iterable[A]) -> Iterable[Tuple[A, A]]:
 
 
 def compose(*functions: Callable) -> Callable:
-    """Compose a variable # of functions."""
-    return reduce(lambda f, g: lambda x: f(g(x)), functions[::-1], lambda x: x)
+    """Compose a variable # of functions, applying the first one first.
+
+    Nested compositions get fused, so calling the result loops over a single
+    flat pipeline (its `functions` attribute) however it was built.
+    """
+    flat = tuple(flatmap(_pipeline, functions))
+    if len(flat) == 1:
+        return flat[0]
+    return _Composed(flat)
+
+
+class _Composed:
+    """Functions applied in turn, each to the result of the previous one."""
+
+    __slots__ = ("functions",)
+
+    def __init__(self, functions: Tuple[Callable, ...]) -> None:
+        self.functions = functions
+
+    def __call__(self, x: Any) -> Any:
+        for f in self.functions:
+            x = f(x)
+        return x
+
+
+def _pipeline(f: Callable) -> Tuple[Callable, ...]:
+    return f.functions if isinstance(f, _Composed) else (f,)
@@ -0,0 +1,235 @@
+"""MinHash signatures and an LSH index for finding similar sets.
+
+Finding near-duplicates by comparing every pair with `jaccard` is quadratic.
+MinHash signatures estimate the Jaccard similarity of two sets from a fixed
+number of hash minimums, and locality sensitive hashing (LSH) buckets them
+by bands, so that only sets likely to be similar ever get compared.
+
+numpy is imported on first use; signatures are computed for many sets at
+once in vectorized batches.
+"""
+import zlib
+from collections import defaultdict
+from itertools import combinations
+from typing import (
+    Any,
+    DefaultDict,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TYPE_CHECKING,
+    Tuple,
+)
+
+from . import jaccard
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+# hashes get permuted as (a * x + b) mod PRIME; with 31 bit operands the
+# product still fits in 64 bits
+PRIME = (1 << 31) - 1
+NUM_PERM = 128
+SEED = 1
+# permuted hashes computed at once by `MinHasher.signatures`
+BATCH_SIZE = 1 << 22
+RECALL = 0.9
+
+
+class Signature:
+    """MinHash signature of a set."""
+
+    def __init__(self, values: "np.ndarray") -> None:
+        """Wrap the per-permutation minimums."""
+        self.values = values
+
+    def jaccard(self, other: "Signature") -> float:
+        """Estimate the Jaccard similarity of the underlying sets."""
+        if len(self.values) != len(other.values):
+            raise ValueError("Signatures of different lengths")
+        return float((self.values == other.values).mean())
+
+    def __len__(self) -> int:
+        """Return the number of permutations."""
+        return len(self.values)
+
+    def __repr__(self) -> str:
+        """Show the signature length."""
+        return f"<Signature num_perm={len(self)}>"
+
+
+class MinHasher:
+    """Computes signatures with `num_perm` seeded hash permutations.
+
+    Signatures are only comparable when computed with the same `num_perm`
+    and `seed`.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = SEED) -> None:
+        """Draw the permutations."""
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, tokens: Iterable[Hashable]) -> Signature:
+        """Compute the signature of a set of tokens."""
+        return self.signatures([tokens])[0]
+
+    def signatures(self, docs: Iterable[Iterable[Hashable]]) -> List[Signature]:
+        """Compute the signatures of many sets of tokens, in batches."""
+        signatures: List[Signature] = []
+        batch: List[List[int]] = []
+        size = 0
+        for doc in docs:
+            hashes = list({_hash(_) for _ in doc})
+            batch.append(hashes)
+            size += max(1, len(hashes)) * self.num_perm
+            if size >= BATCH_SIZE:
+                signatures += self._minimums(batch)
+                batch, size = [], 0
+        if batch:
+            signatures += self._minimums(batch)
+        return signatures
+
+    def _minimums(self, batch: List[List[int]]) -> List[Signature]:
+        import numpy as np
+
+        lengths = np.array([len(_) for _ in batch])
+        hashes = np.fromiter(
+            (h for _ in batch for h in _), dtype=np.uint64, count=lengths.sum()
+        )
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % PRIME
+
+        # empty sets have no minimum: they get PRIME in every position
+        minimums = np.full((len(batch), self.num_perm), PRIME, np.uint64)
+        present = lengths > 0
+        if present.any():
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            minimums[present] = np.minimum.reduceat(
+                permuted, offsets[present], axis=1
+            ).T
+        return [Signature(_) for _ in minimums.astype(np.uint32)]
+
+
+class LSHIndex:
+    """Banded LSH index over MinHash signatures.
+
+    Signatures get split into `bands` bands of `rows` values each, and two
+    keys become candidates when any of their bands match. The split is the
+    most selective one under which pairs at `threshold` similarity still
+    become candidates with probability RECALL (or better, above it).
+    """
+
+    def __init__(
+        self, threshold: float = 0.5, num_perm: int = NUM_PERM
+    ) -> None:
+        """Create an empty index."""
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Threshold not in (0, 1]: {threshold}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = _bands(threshold, num_perm)
+        self._buckets: List[DefaultDict[bytes, List[Hashable]]] = [
+            defaultdict(list) for _ in range(self.bands)
+        ]
+        self._signatures: Dict[Hashable, Signature] = {}
+
+    def __len__(self) -> int:
+        """Return the number of indexed keys."""
+        return len(self._signatures)
+
+    def insert(self, key: Hashable, signature: Signature) -> None:
+        """Index the signature under the given (new) key."""
+        if len(signature) != self.num_perm:
+            raise ValueError(f"Expected {self.num_perm} permutations")
+        if key in self._signatures:
+            raise ValueError(f"Key already indexed: {key}")
+        self._signatures[key] = signature
+        for buckets, band in zip(self._buckets, self._bands_of(signature)):
+            buckets[band].append(key)
+
+    def candidates(self, signature: Signature) -> Set[Hashable]:
+        """Keys sharing at least one band with the signature."""
+        return {
+            key
+            for buckets, band in zip(self._buckets, self._bands_of(signature))
+            for key in buckets.get(band, ())
+        }
+
+    def query(
+        self, signature: Signature, threshold: Optional[float] = None
+    ) -> List[Tuple[Hashable, float]]:
+        """Candidates whose estimated similarity reaches the threshold.
+
+        Returns (key, estimated similarity) pairs, most similar first. The
+        threshold defaults to the one the index was built for.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        found = [
+            (key, signature.jaccard(self._signatures[key]))
+            for key in self.candidates(signature)
+        ]
+        return sorted(
+            (_ for _ in found if _[1] >= threshold), key=lambda _: -_[1]
+        )
+
+    def candidate_pairs(self) -> Iterator[Tuple[Hashable, Hashable]]:
+        """Yield every pair of keys sharing a band, once."""
+        seen: Set[Tuple[Hashable, Hashable]] = set()
+        for buckets in self._buckets:
+            for keys in buckets.values():
+                for pair in combinations(keys, 2):
+                    if pair not in seen:
+                        seen.add(pair)
+                        yield pair
+
+    def _bands_of(self, signature: Signature) -> Iterator[bytes]:
+        values = signature.values
+        for start in range(0, self.bands * self.rows, self.rows):
+            end = start + self.rows
+            yield values[start:end].tobytes()
+
+
+def near_duplicates(
+    docs: Dict[Hashable, Iterable[Hashable]],
+    threshold: float = 0.5,
+    num_perm: int = NUM_PERM,
+    seed: int = SEED,
+) -> Iterator[Tuple[Hashable, Hashable, float]]:
+    """Yield pairs of docs whose exact Jaccard similarity reaches threshold.
+
+    Candidates come from an LSH index, so that only likely matches get
+    verified with `jaccard`; true matches may (rarely) be missed.
+    """
+    sets = {key: set(doc) for key, doc in docs.items()}
+    hasher = MinHasher(num_perm, seed)
+    index = LSHIndex(threshold, num_perm)
+    for key, signature in zip(sets, hasher.signatures(sets.values())):
+        index.insert(key, signature)
+
+    for left, right in index.candidate_pairs():
+        score = jaccard(sets[left], sets[right])
+        if score >= threshold:
+            yield left, right, score
+
+
+def _hash(token: Any) -> int:
+    """Hash that's stable across processes, unlike the builtin one."""
+    data = token if isinstance(token, bytes) else str(token).encode()
+    return zlib.crc32(data) % PRIME
+
+
+def _bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Pick the most rows per band that still keep RECALL at threshold."""
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= RECALL:
+            return bands, rows
+    return num_perm, 1
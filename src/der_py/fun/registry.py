@@ -3,14 +3,51 @@
 This is used to isolate real side effecting clients (talking to network
 services, reading from disk, etc.) from functions that perform some
 business logic as well.
+
+Clients are registered globally, unless a `scope` is active: then they're
+only visible to the current thread or asyncio task, shadowing the global
+ones for as long as the scope lasts.
+
+Expensive clients can be registered as factories instead, to only get built
+when first injected.
 """
 
+import asyncio
+import inspect
+import queue
 import re
+import threading
 from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import wraps
-from typing import Any, Callable, Generator, Pattern, Type, TypeVar
+from itertools import count
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+__REGISTRY: Dict[str, Any] = {}
+# bumped on every registry change, so that injected functions can cache
+# the clients they resolved until then
+__VERSIONS = count(1)
+_version = 0
+_MISSING = object()
 
-__REGISTRY = {}
+SINGLETON = "singleton"
+PER_THREAD = "thread"
+POOLED = "pool"
+POOL_SIZE = 4
+# how often coroutines waiting for a pooled instance check for a free one
+POOL_POLL_INTERVAL = 0.001
 
 Client = TypeVar("Client")
 
@@ -20,26 +57,249 @@ Decorated = Callable[..., ReturnType]
 Decorator = Callable[[ToDecorate], Decorated]
 
 
+class _Scope:
+    """Clients registered within a `scope` block."""
+
+    __slots__ = ("inherited", "clients", "resolved")
+
+    def __init__(self, inherited: Dict[str, Any]) -> None:
+        # clients of the enclosing scope, as of when this one started
+        self.inherited = inherited
+        self.clients = dict(inherited)
+        # clients resolved by `inject` within this scope, by injected keys
+        self.resolved: Dict[Tuple[str, ...], _Resolved] = {}
+
+
+_SCOPE: ContextVar[Optional[_Scope]] = ContextVar(
+    "der_py.fun.registry.scope", default=None
+)
+
+
 def _key(client_class: Type[Client]) -> str:
     return _camel_to_snake(client_class.__name__)
 
 
+def _registry() -> Dict[str, Any]:
+    """Clients registered in the current scope, or the global ones."""
+    current = _SCOPE.get()
+    return __REGISTRY if current is None else current.clients
+
+
+def _lookup(key: str, current: Optional[_Scope]) -> Any:
+    if current is not None and key in current.clients:
+        return current.clients[key]
+    return __REGISTRY.get(key, _MISSING)
+
+
 def register(client_class: Type[Client], instance: Client) -> None:
-    """Register an instantiated client."""
-    __REGISTRY[_key(client_class)] = instance
+    """Register an instantiated client (in the current scope, if any).
+
+    A factory registered for the same client class is closed.
+    """
+    registry = _registry()
+    replaced = registry.get(_key(client_class), _MISSING)
+    registry[_key(client_class)] = instance
+    _bump_version()
+    if replaced is not instance:
+        _close(_key(client_class), replaced)
 
 
 def deregister(client_class: Type[Client]) -> None:
-    """De-register a client."""
-    if _key(client_class) not in __REGISTRY:
+    """De-register a client (from the current scope, if any)."""
+    registry = _registry()
+    if _key(client_class) not in registry:
         raise ValueError(f"Uknown dependency: {client_class}")
-    del __REGISTRY[_key(client_class)]
+    instance = registry.pop(_key(client_class))
+    _bump_version()
+    _close(_key(client_class), instance)
+
+
+def _bump_version() -> None:
+    global _version
+    _version = next(__VERSIONS)
+
+
+def _close(key: str, instance: Any) -> None:
+    """Close a factory that's no longer registered.
+
+    Factories inherited from an enclosing scope are left to it.
+    """
+    current = _SCOPE.get()
+    if current is not None and current.inherited.get(key) is instance:
+        return
+    if isinstance(instance, _Factory):
+        instance.close()
+
+
+def _holder() -> Any:
+    """Identify the running asyncio task, or else the current thread."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return threading.get_ident() if task is None else task
 
 
 def _default_close(_: Client) -> None:
     pass
 
 
+class _Factory:
+    """Builds client instances on demand, sharing them according to scope."""
+
+    def __init__(
+        self,
+        build: Callable[[], Any],
+        scope: str,
+        size: int,
+        on_close: Callable[[Any], None],
+    ) -> None:
+        self.build = build
+        self.scope = scope
+        self.on_close = on_close
+        self._lock = threading.RLock()
+        self._built: List[Any] = []
+        self._local = threading.local()
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        # thread or task -> [pooled instance it holds, times acquired]
+        self._leases: Dict[Any, List[Any]] = {}
+
+    def acquire(self) -> Any:
+        """Get an instance, building it if there's none to reuse."""
+        if self.scope == POOLED:
+            holder = _holder()
+            instance = self._reenter(holder)
+            if instance is _MISSING:
+                # blocks while all `size` instances are handed out
+                self._slots.acquire()
+                instance = self._lend(holder)
+            return instance
+
+        if self.scope == PER_THREAD:
+            instance = getattr(self._local, "instance", _MISSING)
+            if instance is _MISSING:
+                instance = self._local.instance = self._new()
+            return instance
+
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self._new()
+        return self._built[0]
+
+    async def acquire_async(self) -> Any:
+        """Get an instance, without blocking the event loop.
+
+        Coroutines waiting for a pooled instance poll for one instead.
+        """
+        if self.scope != POOLED:
+            return self.acquire()
+        holder = _holder()
+        instance = self._reenter(holder)
+        if instance is _MISSING:
+            while not self._slots.acquire(blocking=False):
+                await asyncio.sleep(POOL_POLL_INTERVAL)
+            instance = self._lend(holder)
+        return instance
+
+    def release(self, instance: Any) -> None:
+        """Hand a pooled instance back, once its holder is done with it."""
+        if self.scope != POOLED:
+            return
+        with self._lock:
+            holder, lease = next(
+                (holder, lease)
+                for holder, lease in self._leases.items()
+                if lease[0] is instance
+            )
+            lease[1] -= 1
+            if lease[1]:
+                return
+            del self._leases[holder]
+            # instances closed meanwhile aren't handed out again
+            if any(_ is instance for _ in self._built):
+                self._idle.put(instance)
+        self._slots.release()
+
+    def close(self) -> None:
+        """Close every instance built so far."""
+        with self._lock:
+            built, self._built = self._built, []
+            self._local = threading.local()
+            self._idle = queue.LifoQueue()
+        for instance in built:
+            self.on_close(instance)
+
+    def _new(self) -> Any:
+        instance = self.build()
+        with self._lock:
+            self._built.append(instance)
+        return instance
+
+    def _reenter(self, holder: Any) -> Any:
+        """Hand `holder` the pooled instance it already has, if any.
+
+        Nested injections share it instead of waiting for another one,
+        which would never free up with a pool of one.
+        """
+        with self._lock:
+            lease = self._leases.get(holder)
+            if lease is None:
+                return _MISSING
+            lease[1] += 1
+            return lease[0]
+
+    def _lend(self, holder: Any) -> Any:
+        """Hand out an idle instance, or a new one, once a slot is taken."""
+        try:
+            instance = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                instance = self._new()
+            except BaseException:
+                self._slots.release()
+                raise
+        with self._lock:
+            self._leases[holder] = [instance, 1]
+        return instance
+
+
+# (registry version, clients, factories), swapped in as a whole so that no
+# locking is needed
+_Resolved = Tuple[int, Dict[str, Any], List[Tuple[str, _Factory]]]
+_UNRESOLVED: _Resolved = (-1, {}, [])
+# clients resolved by `inject` outside of any scope, by injected keys
+__RESOLVED: Dict[Tuple[str, ...], _Resolved] = {}
+
+
+def register_factory(
+    client_class: Type[Client],
+    factory: Callable[[], Client],
+    scope: str = SINGLETON,
+    size: int = POOL_SIZE,
+    on_close: Callable[[Client], None] = _default_close,
+) -> None:
+    """Register a factory building the client on first injection.
+
+    `scope` tells how built instances are shared between injections:
+
+    - SINGLETON: a single instance, shared by everyone.
+    - PER_THREAD: one instance per thread.
+    - POOLED: up to `size` instances, each handed out to one thread or
+      asyncio task at a time; further callers wait for one to free up.
+      Instances are held until a call returns, a coroutine finishes or a
+      generator is exhausted (or closed), and nested calls from the same
+      thread or task share them.
+
+    Instances are only built when needed, and get passed to `on_close`
+    once the client is deregistered.
+    """
+    if scope not in (SINGLETON, PER_THREAD, POOLED):
+        raise ValueError(f"Unknown factory scope: {scope}")
+    register(client_class, _Factory(factory, scope, size, on_close))
+
+
 def inject(*client_classes: Type[Client]) -> Decorator:
     """Decorate receiving function to inject their dependencies.
 
@@ -47,6 +307,10 @@ def inject(*client_classes: Type[Client]) -> Decorator:
     via the 'client' keyword argument, or, if multiple types are supplied,
     via arguments named after the CamelCase -> snake_case transformations.
 
+    Argument names are worked out once, when decorating, and the resolved
+    clients are cached per scope until the registry changes, so that calls
+    only pay for a version check.
+
     Example:
         >>> from der_py.fun.registry import register, inject
         >>> class SomeDep:
@@ -70,29 +334,147 @@ def inject(*client_classes: Type[Client]) -> Decorator:
         if not client_classes:
             return fn
 
+        keys = tuple(_key(_) for _ in client_classes)
+        call = _factory_caller(fn)
+        names = ("client",) if len(keys) == 1 else keys
+
         @wraps(fn)
         def wrapped(*args: Any, **kwargs: Any) -> ReturnType:
-            if len(client_classes) == 1:
-                _cname = _key(client_classes[0])
-                clients_kwargs = (
-                    {"client": __REGISTRY[_cname]}
-                    if _cname in __REGISTRY
-                    else {}
-                )
-            else:
-                clients_kwargs = {
-                    _key(_): __REGISTRY[_key(_)]
-                    for _ in client_classes
-                    if _key(_) in __REGISTRY
-                }
-
-            return fn(*args, **{**clients_kwargs, **kwargs})
+            current = _SCOPE.get()
+            cache = __RESOLVED if current is None else current.resolved
+            version, clients_kwargs, factories = cache.get(keys, _UNRESOLVED)
+            if version != _version:
+                # read the version first: a concurrent change then at
+                # worst causes another refresh on the next call
+                version = _version
+                clients_kwargs = {}
+                factories = []
+                for name, key in zip(names, keys):
+                    instance = _lookup(key, current)
+                    if isinstance(instance, _Factory):
+                        factories.append((name, instance))
+                    elif instance is not _MISSING:
+                        clients_kwargs[name] = instance
+                cache[keys] = (version, clients_kwargs, factories)
+
+            if factories:
+                return call(fn, args, {**clients_kwargs, **kwargs}, factories)
+            if kwargs:
+                return fn(*args, **{**clients_kwargs, **kwargs})
+            return fn(*args, **clients_kwargs)
 
         return wrapped
 
     return wrapper
 
 
+_FactoryCaller = Callable[
+    [
+        ToDecorate,
+        Tuple[Any, ...],
+        Dict[str, Any],
+        List[Tuple[str, _Factory]],
+    ],
+    Any,
+]
+
+
+def _factory_caller(fn: ToDecorate) -> _FactoryCaller:
+    """Pick how to hold factory-built clients for as long as `fn` runs."""
+    if inspect.iscoroutinefunction(fn):
+        return _await_with_factories
+    if inspect.isgeneratorfunction(fn):
+        return _iterate_with_factories
+    if inspect.isasyncgenfunction(fn):
+        return _call_async_generator_with_factories
+    return _call_with_factories
+
+
+def _call_with_factories(
+    fn: ToDecorate,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    factories: List[Tuple[str, _Factory]],
+) -> Any:
+    acquired: List[Tuple[_Factory, Any]] = []
+    try:
+        for name, factory in factories:
+            if name not in kwargs:
+                kwargs[name] = factory.acquire()
+                acquired.append((factory, kwargs[name]))
+        return fn(*args, **kwargs)
+    finally:
+        for factory, instance in acquired:
+            factory.release(instance)
+
+
+async def _await_with_factories(
+    fn: ToDecorate,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    factories: List[Tuple[str, _Factory]],
+) -> Any:
+    acquired: List[Tuple[_Factory, Any]] = []
+    try:
+        for name, factory in factories:
+            if name not in kwargs:
+                kwargs[name] = await factory.acquire_async()
+                acquired.append((factory, kwargs[name]))
+        return await fn(*args, **kwargs)
+    finally:
+        for factory, instance in acquired:
+            factory.release(instance)
+
+
+def _iterate_with_factories(
+    fn: ToDecorate,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    factories: List[Tuple[str, _Factory]],
+) -> Iterator[Any]:
+    acquired: List[Tuple[_Factory, Any]] = []
+    try:
+        for name, factory in factories:
+            if name not in kwargs:
+                kwargs[name] = factory.acquire()
+                acquired.append((factory, kwargs[name]))
+        return (yield from fn(*args, **kwargs))
+    finally:
+        for factory, instance in acquired:
+            factory.release(instance)
+
+
+def _call_async_generator_with_factories(
+    fn: ToDecorate,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    factories: List[Tuple[str, _Factory]],
+) -> Any:
+    if any(factory.scope == POOLED for _, factory in factories):
+        raise TypeError(
+            f"Can't hold pooled clients for async generator {fn.__qualname__}"
+        )
+    return _call_with_factories(fn, args, kwargs, factories)
+
+
+@contextmanager
+def scope() -> Generator[None, None, None]:
+    """Register clients only for the current thread or asyncio task.
+
+    Within the block, `register` and `deregister` act on a registry local
+    to the current context, which starts out with the clients of the
+    enclosing scope (if any) and falls back to the global registry.
+    Threads start out without a scope, asyncio tasks inherit the one
+    active when they were created.
+    """
+    parent = _SCOPE.get()
+    token = _SCOPE.set(_Scope(dict(parent.clients) if parent else {}))
+    try:
+        yield
+    finally:
+        _SCOPE.reset(token)
+
+
 @contextmanager
 def client(
     instance_class: Type[Client],
@@ -102,12 +484,13 @@ def client(
     """Inject the given dependency using a context manager.
 
     Can be useful while writing tests to make sure Mocks get injected
-    instead of real dependencies.
+    instead of real dependencies. The dependency is registered in a new
+    `scope`, so concurrent threads and tasks can each inject their own.
     """
-    register(instance_class, instance)
-    yield instance
-    on_close(instance)
-    deregister(instance_class)
+    with scope():
+        register(instance_class, instance)
+        yield instance
+        on_close(instance)
 
 
 CTS: Pattern = re.compile(r"(?<!^)(?=[A-Z])")
@@ -0,0 +1,148 @@
+"""Bounded-memory grouping for inputs that don't fit in RAM.
+
+Variants of `key_by` and `split_by` that keep at most `max_items` items in
+memory, spilling the rest to (automatically deleted) temporary files. Items
+and keys need to be picklable.
+"""
+# only ever unpickles the temporary files it wrote itself
+import pickle  # noqa: S403
+from collections import defaultdict
+from tempfile import TemporaryFile
+from typing import (
+    Callable,
+    DefaultDict,
+    Generic,
+    IO,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+A = TypeVar("A")
+K = TypeVar("K")
+
+MAX_ITEMS = 100_000
+PARTITIONS = 64
+
+
+def key_by(
+    f: Callable[[A], K],
+    xs: Iterable[A],
+    max_items: int = MAX_ITEMS,
+    partitions: int = PARTITIONS,
+    spill_dir: Optional[str] = None,
+) -> Iterator[Tuple[K, List[A]]]:
+    """Group seq after key, yielding (key, group) pairs lazily.
+
+    Groups are collected in memory until `max_items` items pile up. Then
+    they get spilled, hash-partitioned by key, to `partitions` temporary
+    files. Once the input is exhausted, the files are merged back one at a
+    time, so a single partition needs to fit in memory instead of the whole
+    input. Items keep their order within a group, but groups come out in
+    no particular order once anything got spilled.
+    """
+    groups: DefaultDict[K, List[A]] = defaultdict(list)
+    held = 0
+    spilled: List[IO[bytes]] = []
+    try:
+        for it in xs:
+            groups[f(it)].append(it)
+            held += 1
+            if held >= max_items:
+                if not spilled:
+                    spilled = [
+                        TemporaryFile(dir=spill_dir) for _ in range(partitions)
+                    ]
+                _spill_groups(groups, spilled)
+                groups, held = defaultdict(list), 0
+
+        if not spilled:
+            yield from groups.items()
+            return
+
+        _spill_groups(groups, spilled)
+        groups.clear()
+        for file in spilled:
+            # annotated, as nothing in the call binds K and A for mypy
+            merged: DefaultDict[K, List[A]] = _merge_groups(file)
+            yield from merged.items()
+            file.close()
+    finally:
+        for file in spilled:
+            file.close()
+
+
+def split_by(
+    f: Callable[[A], bool],
+    xs: Iterable[A],
+    max_items: int = MAX_ITEMS,
+    spill_dir: Optional[str] = None,
+) -> Tuple[Iterator[A], Iterator[A]]:
+    """Chops the iterable into two: right fulfills predicate, left doesn't.
+
+    Consumes the whole input, holding at most `max_items` items in memory
+    (half per side) and spilling the rest to temporary files, which the
+    returned iterators read back.
+    """
+    chunk_size = max(1, max_items // 2)
+    left: _SpillBuffer[A] = _SpillBuffer(chunk_size, spill_dir)
+    right: _SpillBuffer[A] = _SpillBuffer(chunk_size, spill_dir)
+    for it in xs:
+        (right if f(it) else left).append(it)
+    return iter(left), iter(right)
+
+
+class _SpillBuffer(Generic[A]):
+    """Append-only list spilling full chunks to a temporary file."""
+
+    def __init__(self, chunk_size: int, spill_dir: Optional[str]) -> None:
+        self.chunk_size = chunk_size
+        self.spill_dir = spill_dir
+        self.items: List[A] = []
+        self.file: Optional[IO[bytes]] = None
+
+    def append(self, item: A) -> None:
+        self.items.append(item)
+        if len(self.items) >= self.chunk_size:
+            if self.file is None:
+                self.file = TemporaryFile(dir=self.spill_dir)
+            pickle.dump(self.items, self.file, pickle.HIGHEST_PROTOCOL)
+            self.items = []
+
+    def __iter__(self) -> Iterator[A]:
+        if self.file is not None:
+            with self.file:
+                self.file.seek(0)
+                yield from (_ for chunk in _load_all(self.file) for _ in chunk)
+        yield from self.items
+
+
+def _spill_groups(
+    groups: DefaultDict[K, List[A]], files: List[IO[bytes]]
+) -> None:
+    """Append the groups to the files, partitioned by the hash of the key."""
+    partitioned: DefaultDict[int, List[Tuple[K, List[A]]]] = defaultdict(list)
+    for key, group in groups.items():
+        partitioned[hash(key) % len(files)].append((key, group))
+    for idx, chunk in partitioned.items():
+        pickle.dump(chunk, files[idx], pickle.HIGHEST_PROTOCOL)
+
+
+def _merge_groups(file: IO[bytes]) -> DefaultDict[K, List[A]]:
+    file.seek(0)
+    groups: DefaultDict[K, List[A]] = defaultdict(list)
+    for chunk in _load_all(file):
+        for key, group in chunk:
+            groups[key].extend(group)
+    return groups
+
+
+def _load_all(file: IO[bytes]) -> Iterator[list]:
+    while True:
+        try:
+            yield pickle.load(file)  # noqa: S301
+        except EOFError:
+            return
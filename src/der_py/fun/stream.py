@@ -0,0 +1,173 @@
+"""Lazy iterator pipelines.
+
+Chains the `der_py.fun` helpers into multi-stage pipelines that only pull
+items as they're consumed, can batch them and fan work out over a bounded
+pool of threads or processes:
+
+    >>> from der_py.fun.stream import Stream
+    >>> Stream(range(10)).map(lambda _: _ * 2).chunked(4).to_list()
+    [[0, 2, 4, 6], [8, 10, 12, 14], [16, 18]]
+"""
+from collections import deque
+from concurrent.futures import (
+    Executor,
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from itertools import islice
+from typing import (
+    Callable,
+    DefaultDict,
+    Deque,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from . import compose, flatmap, key_by, pairwise, split_by
+
+A = TypeVar("A")
+B = TypeVar("B")
+K = TypeVar("K")
+
+EXECUTORS: Dict[str, Callable[[int], Executor]] = {
+    "thread": ThreadPoolExecutor,
+    "process": ProcessPoolExecutor,
+}
+
+
+class Stream(Generic[A]):
+    """Lazy pipeline over an iterable.
+
+    Every stage returns a new Stream; nothing runs until it's iterated over
+    (or collected by one of the terminal operations).
+    """
+
+    def __init__(self, xs: Iterable[A]) -> None:
+        """Wrap the source iterable."""
+        self._xs = xs
+
+    def __iter__(self) -> Iterator[A]:
+        """Pull items through the pipeline."""
+        return iter(self._xs)
+
+    def map(self, f: Callable[[A], B]) -> "Stream[B]":
+        """Apply f to every item."""
+        return Stream(map(f, self._xs))
+
+    def pipe(self, *functions: Callable) -> "Stream":
+        """Apply the composition of the functions to every item."""
+        return self.map(compose(*functions))
+
+    def filter(self, f: Callable[[A], bool]) -> "Stream[A]":
+        """Keep the items f holds for."""
+        return Stream(filter(f, self._xs))
+
+    def flatmap(self, f: Callable[[A], Iterable[B]]) -> "Stream[B]":
+        """Map f over the items and flatten the results."""
+        return Stream(flatmap(f, self._xs))
+
+    def pairwise(self) -> "Stream[Tuple[A, A]]":
+        """Pair up consecutive items."""
+        return Stream(pairwise(self._xs))
+
+    def chunked(self, n: int) -> "Stream[List[A]]":
+        """Batch items into lists of n, the last one possibly shorter."""
+        if n < 1:
+            raise ValueError(f"Chunk size must be positive, got: {n}")
+        return Stream(_chunked(iter(self._xs), n))
+
+    def par_map(
+        self,
+        f: Callable[[A], B],
+        workers: int = 4,
+        executor: str = "thread",
+        ordered: bool = True,
+        buffer: Optional[int] = None,
+    ) -> "Stream[B]":
+        """Apply f to every item in parallel.
+
+        At most `buffer` items (twice the workers, by default) are pulled
+        from upstream ahead of consumption, which provides backpressure.
+        Results keep their input order unless `ordered` is off, in which
+        case they're yielded as soon as they're ready. With the "process"
+        executor, f and the items need to be picklable.
+        """
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor}")
+        pending = buffer or 2 * workers
+        if pending < workers:
+            raise ValueError("The buffer can't be smaller than the workers")
+        mapper = _ordered if ordered else _unordered
+        return Stream(
+            mapper(f, iter(self._xs), EXECUTORS[executor], workers, pending)
+        )
+
+    def to_list(self) -> List[A]:
+        """Collect all items."""
+        return list(self._xs)
+
+    def key_by(self, f: Callable[[A], K]) -> DefaultDict[K, List[A]]:
+        """Group all items by key."""
+        return key_by(f, self._xs)
+
+    def split_by(self, f: Callable[[A], bool]) -> Tuple[List[A], List[A]]:
+        """Split all items into those f doesn't hold for and those it does."""
+        return split_by(f, self._xs)
+
+
+def _chunked(xs: Iterator[A], n: int) -> Iterator[List[A]]:
+    chunk = list(islice(xs, n))
+    while chunk:
+        yield chunk
+        chunk = list(islice(xs, n))
+
+
+def _ordered(
+    f: Callable[[A], B],
+    xs: Iterator[A],
+    executor_type: Callable[[int], Executor],
+    workers: int,
+    buffer: int,
+) -> Iterator[B]:
+    executor = executor_type(workers)
+    try:
+        futures: Deque["Future[B]"] = deque(
+            executor.submit(f, _) for _ in islice(xs, buffer)
+        )
+        while futures:
+            result = futures.popleft().result()
+            futures.extend(executor.submit(f, _) for _ in islice(xs, 1))
+            yield result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _unordered(
+    f: Callable[[A], B],
+    xs: Iterator[A],
+    executor_type: Callable[[int], Executor],
+    workers: int,
+    buffer: int,
+) -> Iterator[B]:
+    executor = executor_type(workers)
+    try:
+        pending: Set["Future[B]"] = {
+            executor.submit(f, _) for _ in islice(xs, buffer)
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending |= {executor.submit(f, _) for _ in islice(xs, 1)}
+                yield future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
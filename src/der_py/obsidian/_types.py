@@ -1,11 +1,13 @@
 """Obsidian types: notes and such."""
 from contextlib import suppress
 from dataclasses import dataclass, field
-from functools import cached_property
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Any, Dict, NamedTuple
+from typing import Any, Dict, List, NamedTuple, Optional, Type
 
-import yaml
+DELIMITER = "---"
+DELIMITER_BYTES = DELIMITER.encode()
+MAX_FRONTMATTER_SIZE = 64 * 1024
 
 
 @dataclass(frozen=True)
@@ -32,6 +34,9 @@ class Note:
     """Note model."""
 
     path: Path
+    max_frontmatter_size: int = field(
+        default=MAX_FRONTMATTER_SIZE, compare=False
+    )
 
     def rel_name(self, vault_dir: Path) -> str:
         """Name of the note relative to the vault root."""
@@ -39,18 +44,54 @@ class Note:
 
     @cached_property
     def frontmatter(self) -> Frontmatter:
-        """Parse the YAML frontmatter."""
-        lines = self.path.read_text().splitlines()
-        if not lines:
+        """Parse the YAML frontmatter.
+
+        Only the leading delimited block is read from disk. Blocks larger
+        than max_frontmatter_size (or never closed) are ignored.
+        """
+        raw = read_frontmatter(self.path, self.max_frontmatter_size)
+        if raw is None:
             return {}
 
-        l_iter = iter(lines)
-        if next(l_iter) == "---":
-            frontmatter = ""
-            while (l := next(l_iter)) != "---":
-                frontmatter += l
-                frontmatter += "\n"
-            with suppress(yaml.YAMLError):
-                return yaml.safe_load(frontmatter)
+        import yaml
+
+        with suppress(yaml.YAMLError):
+            loaded = yaml.load(raw, Loader=_safe_loader())  # noqa: S506
+            if isinstance(loaded, dict):
+                return loaded
 
         return {}
+
+
+@lru_cache(maxsize=None)
+def _safe_loader() -> Type:
+    """Prefer the libyaml backed loader, imported lazily (like yaml itself)."""
+    try:
+        from yaml import CSafeLoader
+
+        return CSafeLoader
+    except ImportError:  # pragma: no cover - libyaml not available
+        from yaml import SafeLoader
+
+        return SafeLoader
+
+
+def read_frontmatter(path: Path, max_size: int) -> Optional[str]:
+    """Read the raw frontmatter block, stopping at the closing delimiter."""
+    with open(path, "rb") as f:
+        if f.readline(len(DELIMITER) + 2).rstrip(b"\r\n") != DELIMITER_BYTES:
+            return None
+
+        lines: List[bytes] = []
+        size = 0
+        while size <= max_size:
+            # a truncated read is always longer than the remaining budget
+            line = f.readline(max_size - size + len(DELIMITER) + 2)
+            if not line:
+                return None
+            if line.rstrip(b"\r\n") == DELIMITER_BYTES:
+                return b"".join(lines).decode()
+            lines.append(line)
+            size += len(line)
+
+    return None
@@ -0,0 +1,121 @@
+"""Persistent, incremental alias index for a vault.
+
+Notes are keyed by their vault-relative path together with their mtime and
+size. Only notes whose key changed since the last run get re-parsed, notes
+that disappeared from the vault get pruned.
+"""
+import json
+from contextlib import closing
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    TYPE_CHECKING,
+    Tuple,
+)
+
+from . import Note
+
+if TYPE_CHECKING:  # pragma: no cover
+    import sqlite3
+
+INDEX_NAME = ".otk-index.sqlite3"
+SCHEMA_VERSION = 1
+# seconds to wait for a concurrent run holding the index
+LOCK_TIMEOUT = 5.0
+
+Aliaser = Callable[[Note], List[str]]
+_Row = Tuple[int, int, str]
+
+
+def indexed_aliases(
+    vault_dir: Path, aliaser: Aliaser, index_path: Optional[Path] = None
+) -> Iterable[Tuple[Note, List[str]]]:
+    """Yield (note, aliases) for every note in the vault, using the index.
+
+    The index lives at `index_path` (defaults to INDEX_NAME under the vault)
+    and gets brought up to date as a side effect. Should the index stay
+    locked by a concurrent run, every note gets parsed without it.
+    """
+    import sqlite3
+
+    db_path = index_path or vault_dir / INDEX_NAME
+    try:
+        return _refresh(vault_dir, aliaser, db_path)
+    except sqlite3.OperationalError:
+        # locked (or otherwise unavailable), but not necessarily broken
+        return [(note, aliaser(note)) for note in _notes(vault_dir)]
+    except sqlite3.DatabaseError:
+        # corrupt or foreign file: start over from scratch
+        db_path.unlink(missing_ok=True)
+        return _refresh(vault_dir, aliaser, db_path)
+
+
+def _refresh(
+    vault_dir: Path, aliaser: Aliaser, db_path: Path
+) -> List[Tuple[Note, List[str]]]:
+    import sqlite3
+
+    with closing(
+        sqlite3.connect(db_path.as_posix(), timeout=LOCK_TIMEOUT)
+    ) as conn:
+        _ensure_schema(conn)
+        known: Dict[str, _Row] = {
+            path: (mtime_ns, size, aliases)
+            for path, mtime_ns, size, aliases in conn.execute(
+                "SELECT path, mtime_ns, size, aliases FROM notes"
+            )
+        }
+
+        result, upserts = [], []
+        for note in _notes(vault_dir):
+            rel_path = note.path.relative_to(vault_dir).as_posix()
+            stat = note.path.stat()
+            row = known.pop(rel_path, None)
+            if row is not None and row[:2] == (stat.st_mtime_ns, stat.st_size):
+                aliases = json.loads(row[2])
+            else:
+                aliases = aliaser(note)
+                upserts.append(
+                    (
+                        rel_path,
+                        stat.st_mtime_ns,
+                        stat.st_size,
+                        json.dumps(aliases),
+                    )
+                )
+            result.append((note, aliases))
+
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?)", upserts
+            )
+            conn.executemany(
+                "DELETE FROM notes WHERE path = ?", ((_,) for _ in known)
+            )
+
+    return result
+
+
+def _notes(vault_dir: Path) -> Iterable[Note]:
+    return (Note(path=_) for _ in vault_dir.rglob("**/*.md"))
+
+
+def _ensure_schema(conn: "sqlite3.Connection") -> None:
+    (version,) = conn.execute("PRAGMA user_version").fetchone()
+    if version == SCHEMA_VERSION:
+        return
+    with conn:
+        conn.execute("DROP TABLE IF EXISTS notes")
+        conn.execute(
+            "CREATE TABLE notes ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " aliases TEXT NOT NULL"
+            ")"
+        )
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION:d}")
@@ -5,12 +5,18 @@ Then scans the input file for lines containing links to notes
 in the map and replaces them with aliased links:
 
 [[an/aliased/note]] -> [[an/aliased/note|the_alias]]
+
+Two engines are available: `rewrite_line` tokenizes wikilinks once and
+resolves them through a dict, so it scales with the size of the note;
+`process_line` matches a single alternation regex built from the replace
+map and is kept around as a fallback.
 """
 import re
 from pathlib import Path
-from typing import Any, Dict, Iterable, Union, cast
+from typing import Any, Dict, Iterable, Optional, Pattern, Union, cast
 
 from . import Line, Note
+from .index import indexed_aliases
 from ..fun import flatmap
 
 AbsName = str
@@ -20,11 +26,33 @@ AliasedLink = str
 
 AliasMap = Dict[Alias, AbsName]
 ReplaceMap = Dict[PageLink, AliasedLink]
+LinkMap = Dict[AbsName, AliasedLink]
+
+WIKILINK: Pattern = re.compile(r"\[\[([^\[\]]+)\]\]")
+
+
+def vault_replace_map(
+    vault_dir: Path, index_path: Optional[Path] = None
+) -> ReplaceMap:
+    """Compute the replace map for the given vault dir.
+
+    If an index path is given, frontmatter is only re-parsed for notes
+    that changed since the index was last refreshed.
+    """
+    return _replace_map(_vault_alias_map(vault_dir, index_path))
+
 
+def vault_link_map(
+    vault_dir: Path, index_path: Optional[Path] = None
+) -> LinkMap:
+    """Compute the link target -> aliased link map for the given vault dir."""
+    return _link_map(_vault_alias_map(vault_dir, index_path))
 
-def vault_replace_map(vault_dir: Path) -> ReplaceMap:
-    """Compute the replace map for the given vault dir."""
-    return _replace_map(_alias_map(vault_dir))
+
+def _vault_alias_map(vault_dir: Path, index_path: Optional[Path]) -> AliasMap:
+    if index_path is None:
+        return _alias_map(vault_dir)
+    return _indexed_alias_map(vault_dir, index_path)
 
 
 def _alias_map(from_dir: Path) -> AliasMap:
@@ -36,6 +64,14 @@ def _alias_map(from_dir: Path) -> AliasMap:
     }
 
 
+def _indexed_alias_map(from_dir: Path, index_path: Path) -> AliasMap:
+    return {
+        alias: note.rel_name(from_dir)
+        for note, aliases in indexed_aliases(from_dir, _all_aliases, index_path)
+        for alias in aliases
+    }
+
+
 def _all_aliases(note: Note) -> list[str]:
     return sorted(
         set(
@@ -66,6 +102,29 @@ def _replace_map(alias_map: AliasMap) -> ReplaceMap:
     }
 
 
+def _link_map(alias_map: AliasMap) -> LinkMap:
+    return {
+        abs_name: f"[[{abs_name}|{alias}]]"
+        for alias, abs_name in alias_map.items()
+        if alias != abs_name
+    }
+
+
+def rewrite_line(line: Line, link_map: LinkMap) -> Iterable[str]:
+    """Replace links by looking up each wikilink target in the map."""
+    yield WIKILINK.sub(
+        lambda m: link_map.get(m.group(1), m.group(0)), line.text
+    )
+
+
+def count_changed_links(before: str, after: str) -> int:
+    """Count wikilinks that differ between two versions of a text."""
+    return sum(
+        old != new
+        for old, new in zip(WIKILINK.findall(before), WIKILINK.findall(after))
+    )
+
+
 def process_line(
     line: Line, re_pat: re.Pattern, re_map: Dict[str, str]
 ) -> Iterable[str]:
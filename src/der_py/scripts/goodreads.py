@@ -1,14 +1,58 @@
 """Do Goodreads stuff."""
 import csv
+import heapq
 import json
+import logging
+from contextlib import ExitStack
 from dataclasses import asdict, dataclass
-from multiprocessing import Pool
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Iterable, NamedTuple, Sequence, Tuple, TypedDict, cast
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypedDict,
+    cast,
+)
 
 import click
 
-from der_py.clients.goodreads import get_book_ratings
+from der_py.clients.goodreads import (
+    CACHE_SIZE,
+    CACHE_TTL,
+    RatingCache,
+    Ratings,
+    SessionRatingFetcher,
+    default_cache_path,
+    get_book_ratings,
+)
+
+CACHE_BATCH = 100
+PERCENTILES = (0, 10, 25, 50, 75, 90, 100)
+
+
+@lru_cache(maxsize=None)
+def _numpy() -> Any:
+    """Import numpy on first use, it's an optional (and heavy) speedup."""
+    import numpy
+
+    return numpy
+
+
+@lru_cache(maxsize=None)
+def _has_numpy() -> bool:
+    """Check whether numpy can be imported."""
+    try:
+        _numpy()
+    except ImportError:  # pragma: no cover
+        return False
+    return True
 
 
 class _Record(TypedDict, total=False):
@@ -50,6 +94,67 @@ class _Rating(NamedTuple):
         return total / total_ratings
 
 
+class _RatingBatch:
+    """Rating histograms of a whole export, as a single (n, 5) array.
+
+    Vectorized counterpart of _Rating (needs numpy, see _numpy): same
+    column order, same interpolation of missing three star counts.
+    """
+
+    WEIGHTS = (5, 4, 3, 2, 1)
+
+    def __init__(self, ratings: Iterable[Sequence[int]]) -> None:
+        np = _numpy()
+        rows = list(ratings)
+        try:
+            counts = np.array(rows, dtype=np.float64)
+        except ValueError:  # ragged, some histograms are short
+            counts = None
+        if counts is None or counts.shape != (len(rows), 5):
+            padded = [tuple(_Rating(*_)) for _ in rows]
+            counts = np.array(padded, dtype=np.float64).reshape(-1, 5)
+        self.counts = counts
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    @cached_property
+    def deviant(self) -> Any:
+        np = _numpy()
+        five, four, three, two, one = self.counts.T
+        divident = np.where(three == 0, (four + two) / 2, three)
+        safe = np.where(divident == 0, 1, divident)
+        return np.where(divident == 0, 0.0, (five + one) / safe)
+
+    @cached_property
+    def average(self) -> Any:
+        np = _numpy()
+        totals = self.counts.sum(axis=1)
+        weighted = self.counts @ np.array(self.WEIGHTS, dtype=np.float64)
+        return np.where(
+            totals == 0, 0.0, weighted / np.where(totals, totals, 1)
+        )
+
+    def percentiles(self, qs: Sequence[float]) -> Dict[str, List[float]]:
+        """Compute percentiles of deviant and average ratings."""
+        np = _numpy()
+        return {
+            "deviant": np.percentile(self.deviant, qs).tolist(),
+            "average": np.percentile(self.average, qs).tolist(),
+        }
+
+    def ranking(self, tie_break: Optional[Sequence[int]] = None) -> Any:
+        """Return indices sorted by descending deviant rating.
+
+        Ties are broken by ascending `tie_break` (e.g. CSV rows), and by
+        position without one.
+        """
+        np = _numpy()
+        if tie_break is None:
+            return np.argsort(-self.deviant, kind="stable")
+        return np.lexsort((np.asarray(tie_break), -self.deviant))
+
+
 @dataclass(frozen=True)
 class _Book:
     book_id: int
@@ -68,21 +173,21 @@ class _Book:
 class _RatedBook(NamedTuple):
     book: _Book
     rating: _Rating
+    # index of the book's row in the CSV export, breaks ties when sorting
+    row: int = -1
 
-    @classmethod
-    def from_book(
-        cls,
-        book: _Book,
-    ) -> "_RatedBook":
-        return cls(book=book, rating=_Rating(*get_book_ratings(book.book_id)))
-
-    def as_record(self) -> _Record:
+    def as_record(
+        self, deviant: Optional[float] = None, average: Optional[float] = None
+    ) -> _Record:
+        # scores precomputed by _RatingBatch save recomputing them per book
+        deviant = self.rating.deviant if deviant is None else deviant
+        average = self.rating.average if average is None else average
         return cast(
             _Record,
             {
                 **asdict(self.book),
-                "deviant_rating": f"{self.rating.deviant:0.4f}",
-                "average_rating": f"{self.rating.average:0.4f}",
+                "deviant_rating": f"{deviant:0.4f}",
+                "average_rating": f"{average:0.4f}",
                 "ratings": tuple(self.rating),
             },
         )
@@ -99,17 +204,99 @@ def _normalize_key(key: str) -> str:
     return key.lower().replace(" ", "_")
 
 
-def _process_csv_export(csv_path: Path) -> Sequence[_RatedBook]:
+def _process_csv_export(
+    csv_path: Path,
+    fetcher: Optional[SessionRatingFetcher] = None,
+    cache: Optional[RatingCache] = None,
+    top: Optional[int] = None,
+) -> List[_Record]:
+    rated_books = _iter_rated_books(csv_path, fetcher, cache)
+    if top is not None:
+        top_books = heapq.nsmallest(top, rated_books, key=_rank)
+        return [_.as_record() for _ in top_books]
+    if _has_numpy():
+        return _batch_records(list(rated_books))
+    return [_.as_record() for _ in sorted(rated_books, key=_rank)]
+
+
+def _batch_records(rated_books: Sequence[_RatedBook]) -> List[_Record]:
+    """Score and sort all books at once, in vectorized form."""
+    batch = _RatingBatch(_.rating for _ in rated_books)
+    deviant, average = batch.deviant.tolist(), batch.average.tolist()
+    return [
+        rated_books[_].as_record(deviant[_], average[_])
+        for _ in batch.ranking([_.row for _ in rated_books])
+    ]
+
+
+def _rank(rated_book: _RatedBook) -> Tuple[float, int]:
+    """Sort key: most deviant first, in CSV order on ties."""
+    return -rated_book.rating.deviant, rated_book.row
+
+
+def _iter_rated_books(
+    csv_path: Path,
+    fetcher: Optional[SessionRatingFetcher] = None,
+    cache: Optional[RatingCache] = None,
+) -> Iterator[_RatedBook]:
+    """Yield rated books in completion order, cached ones first."""
     books = [
-        _Book.from_record(_)
-        for _ in _read_csv(csv_path)
-        if "to-read" in _.get("bookshelves", "")
+        (row, _Book.from_record(record))
+        for row, record in enumerate(_read_csv(csv_path))
+        if "to-read" in record.get("bookshelves", "")
     ]
 
+    cached = cache.get_many(book.book_id for _, book in books) if cache else {}
+    for row, book in books:
+        if str(book.book_id) in cached:
+            yield _RatedBook(book, _Rating(*cached[str(book.book_id)]), row)
+
+    to_fetch = [
+        (row, book) for row, book in books if str(book.book_id) not in cached
+    ]
+    if not to_fetch:
+        return
+
+    fresh: Dict[int, Ratings] = {}
+    try:
+        for row, book, ratings in _rate_books(to_fetch, fetcher):
+            yield _RatedBook(book, _Rating(*ratings), row)
+            if cache:
+                # raw, so that failed fetches ([]) can be told apart
+                fresh[book.book_id] = ratings
+                if len(fresh) >= CACHE_BATCH:
+                    cache.put_many(fresh)
+                    fresh.clear()
+    finally:
+        # keep what was fetched, even if the run gets cut short
+        if cache and fresh:
+            cache.put_many(fresh)
+
+
+def _rate_books(
+    books: Sequence[Tuple[int, _Book]],
+    fetcher: Optional[SessionRatingFetcher],
+) -> Iterator[Tuple[int, _Book, Ratings]]:
+    """Fetch raw ratings of (row, book) pairs, in completion order."""
+    if fetcher is not None:
+        # an export can list a book more than once, fetch it only once
+        rows: Dict[int, List[Tuple[int, _Book]]] = {}
+        for row, book in books:
+            rows.setdefault(book.book_id, []).append((row, book))
+        for book_id, ratings in fetcher.map_unordered(rows):
+            for row, book in rows[book_id]:
+                yield row, book, ratings
+        return
+
+    from multiprocessing import Pool
+
     with Pool() as pool:
-        rated_books = pool.map(_RatedBook.from_book, books)
+        yield from pool.imap_unordered(_fetch_row, books)
 
-    return sorted(rated_books, key=lambda _: _.rating.deviant, reverse=True)
+
+def _fetch_row(row_book: Tuple[int, _Book]) -> Tuple[int, _Book, Ratings]:
+    row, book = row_book
+    return row, book, get_book_ratings(book.book_id)
 
 
 @click.command()
@@ -117,9 +304,140 @@ def _process_csv_export(csv_path: Path) -> Sequence[_RatedBook]:
     "csv_path",
     type=click.Path(exists=True, dir_okay=False, file_okay=True),
 )
-def main(csv_path: str) -> None:
+@click.option(
+    "concurrency",
+    "--concurrency",
+    "-c",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Fetch over a pooled HTTP session with this many concurrent requests"
+    " instead of one process per core",
+)
+@click.option(
+    "rate",
+    "--rate",
+    type=click.FloatRange(min=0.001),
+    default=5.0,
+    help="Max requests per second when using --concurrency",
+    show_default=True,
+)
+@click.option(
+    "use_cache",
+    "--cache/--no-cache",
+    default=True,
+    help="Keep fetched ratings in an on-disk cache",
+    show_default=True,
+)
+@click.option(
+    "refresh_cache",
+    "--refresh-cache",
+    is_flag=True,
+    default=False,
+    help="Ignore cached ratings, but store the freshly fetched ones",
+)
+@click.option(
+    "cache_ttl",
+    "--cache-ttl",
+    type=click.FloatRange(min=0),
+    default=CACHE_TTL / 3600,
+    help="Hours before a cached rating goes stale",
+    show_default=True,
+)
+@click.option(
+    "cache_size",
+    "--cache-size",
+    type=click.IntRange(min=1),
+    default=CACHE_SIZE,
+    help="Max number of books kept in the cache",
+    show_default=True,
+)
+@click.option(
+    "out_format",
+    "--format",
+    type=click.Choice(["json", "jsonl"]),
+    default="json",
+    help="One sorted JSON array, or one JSON record per line as soon as"
+    " each book is rated",
+    show_default=True,
+)
+@click.option(
+    "top",
+    "--top",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Only keep the N most deviant books, sorted (bounded memory)",
+)
+@click.option(
+    "percentiles",
+    "--percentiles",
+    is_flag=True,
+    default=False,
+    help="Print percentiles of the deviant and average ratings instead of"
+    " the books (needs numpy)",
+)
+@click.option(
+    "debug",
+    "--debug",
+    is_flag=True,
+    default=False,
+    help="Log debug output (e.g. bytes read per book) to stderr",
+)
+def main(
+    csv_path: str,
+    concurrency: Optional[int],
+    rate: float,
+    use_cache: bool,
+    refresh_cache: bool,
+    cache_ttl: float,
+    cache_size: int,
+    out_format: str,
+    top: Optional[int],
+    percentiles: bool,
+    debug: bool,
+) -> None:
     """Process CSV exports from Goodreads into JSON records."""
+    if percentiles and not _has_numpy():
+        raise click.UsageError("--percentiles needs numpy: der-py[numpy]")
+    if debug:
+        logging.basicConfig(level=logging.DEBUG)
     real_csv_path = Path(csv_path)
 
-    deviant_sorted_books = _process_csv_export(real_csv_path)
-    print(json.dumps([_.as_record() for _ in deviant_sorted_books]))
+    with ExitStack() as stack:
+        fetcher = (
+            stack.enter_context(
+                SessionRatingFetcher(concurrency=concurrency, rate=rate)
+            )
+            if concurrency is not None
+            else None
+        )
+        cache = (
+            stack.enter_context(
+                RatingCache(
+                    default_cache_path(),
+                    ttl=0 if refresh_cache else cache_ttl * 3600,
+                    max_entries=cache_size,
+                )
+            )
+            if use_cache
+            else None
+        )
+        if percentiles:
+            rated_books = _iter_rated_books(real_csv_path, fetcher, cache)
+            batch = _RatingBatch(_.rating for _ in rated_books)
+            stats = batch.percentiles(PERCENTILES)
+            print(json.dumps({"percentiles": PERCENTILES, **stats}))
+        elif out_format == "jsonl" and top is None:
+            for rated_book in _iter_rated_books(real_csv_path, fetcher, cache):
+                print(json.dumps(rated_book.as_record()), flush=True)
+        else:
+            records = _process_csv_export(real_csv_path, fetcher, cache, top)
+            if out_format == "jsonl":
+                for record in records:
+                    print(json.dumps(record))
+            else:
+                print(json.dumps(records))
+
+    if cache:
+        click.echo(
+            f"cache: {cache.hits} hit(s), {cache.misses} miss(es)", err=True
+        )
@@ -1,13 +1,70 @@
 """Do Obsidian stuff."""
+import os
 import re
+import shutil
+import time
 from functools import partial
 from pathlib import Path
-from typing import Callable, Iterable, List
+from tempfile import NamedTemporaryFile
+from typing import Callable, Iterable, List, NamedTuple, Optional, cast
 
 import click
 
 from ..fun import flatmap
 from ..obsidian import Args, Line, Note, auto_alias, use_alias
+from ..obsidian.index import INDEX_NAME
+
+
+class Change(NamedTuple):
+    """What processing did (or would do) to a file."""
+
+    changed: bool = False
+    links: int = 0
+
+
+class FileReport(NamedTuple):
+    """Per-file processing report."""
+
+    path: str
+    elapsed: float
+    pid: int
+    change: Change
+
+
+FileJob = Callable[[Path], Change]
+
+_WORKER_JOB: Optional[FileJob] = None
+
+jobs_option = click.option(
+    "jobs",
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of worker processes",
+    show_default=True,
+)
+timings_option = click.option(
+    "timings",
+    "--timings",
+    is_flag=True,
+    default=False,
+    help="Report per-file timings and a summary on stderr",
+)
+dry_run_option = click.option(
+    "dry_run",
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="Only report what would change (implies --stats)",
+)
+stats_option = click.option(
+    "stats",
+    "--stats",
+    is_flag=True,
+    default=False,
+    help="Report how many files and links changed",
+)
 
 
 @click.group()
@@ -24,21 +81,23 @@ def main() -> None:
     multiple=True,
 )
 @click.option("lower", "--lower", is_flag=True, required=False, default=False)
-def do_auto_alias(in_file: List[str], lower: bool) -> None:
+@jobs_option
+@timings_option
+@dry_run_option
+@stats_option
+def do_auto_alias(
+    in_file: List[str],
+    lower: bool,
+    jobs: int,
+    timings: bool,
+    dry_run: bool,
+    stats: bool,
+) -> None:
     """Infer an alias from the filename and write it as YAML front matter."""
-    for f in in_file:
-        args = Args(
-            in_file=Path(f),
-            out_file=Path(f),
-            extras={"lower": lower},
-        )
-        note = Note(args.in_file)
-        if set(note.frontmatter.keys()) & {"alias", "aliases"}:
-            continue
-        line_processor = partial(
-            auto_alias.process_line, aliases=auto_alias.get_aliases(args)
-        )
-        _process_file(args, line_processor)
+    job = partial(_auto_alias_file, lower=lower, dry_run=dry_run)
+    changes = _process_files(in_file, job, jobs, timings)
+    if stats or dry_run:
+        _echo_stats(changes, dry_run)
 
 
 @main.command("use-alias")
@@ -55,25 +114,194 @@ def do_auto_alias(in_file: List[str], lower: bool) -> None:
     type=click.Path(dir_okay=False, file_okay=True, exists=True),
     multiple=True,
 )
-def do_use_alias(vault_dir: str, in_file: List[str]) -> None:
+@click.option(
+    "use_index",
+    "--index/--no-index",
+    default=True,
+    help=f"Keep an incremental alias index in VAULT_DIR/{INDEX_NAME}",
+    show_default=True,
+)
+@click.option(
+    "engine",
+    "--engine",
+    type=click.Choice(["links", "regex"]),
+    default="links",
+    help="Tokenize wikilinks (links) or match one big alternation (regex)",
+    show_default=True,
+)
+@jobs_option
+@timings_option
+@dry_run_option
+@stats_option
+def do_use_alias(
+    vault_dir: str,
+    in_file: List[str],
+    use_index: bool,
+    engine: str,
+    jobs: int,
+    timings: bool,
+    dry_run: bool,
+    stats: bool,
+) -> None:
     """Replace plain links to aliased notes with aliased links."""
-    replace_map = use_alias.vault_replace_map(Path(vault_dir))
-    pattern = re.compile("|".join(replace_map.keys()))
+    vault_path = Path(vault_dir)
+    index_path = vault_path / INDEX_NAME if use_index else None
 
-    for f in in_file:
-        args = Args(in_file=Path(f), out_file=Path(f))
+    line_processor: Callable[[Line], Iterable[str]]
+    if engine == "regex":
+        replace_map = use_alias.vault_replace_map(vault_path, index_path)
         line_processor = partial(
             use_alias.process_line,
-            re_pat=pattern,
+            re_pat=re.compile("|".join(replace_map.keys())),
             re_map=replace_map,
         )
-        _process_file(args, line_processor)
+    else:
+        line_processor = partial(
+            use_alias.rewrite_line,
+            link_map=use_alias.vault_link_map(vault_path, index_path),
+        )
+
+    job = partial(
+        _use_alias_file, line_processor=line_processor, dry_run=dry_run
+    )
+    changes = _process_files(in_file, job, jobs, timings)
+    if stats or dry_run:
+        _echo_stats(changes, dry_run)
+
+
+def _auto_alias_file(path: Path, lower: bool, dry_run: bool) -> Change:
+    args = Args(in_file=path, out_file=path, extras={"lower": lower})
+    note = Note(args.in_file)
+    if set(note.frontmatter.keys()) & {"alias", "aliases"}:
+        return Change()
+    line_processor = partial(
+        auto_alias.process_line, aliases=auto_alias.get_aliases(args)
+    )
+    return _process_file(args, line_processor, dry_run)
+
+
+def _use_alias_file(
+    path: Path,
+    line_processor: Callable[[Line], Iterable[str]],
+    dry_run: bool,
+) -> Change:
+    return _process_file(
+        Args(in_file=path, out_file=path), line_processor, dry_run
+    )
+
+
+def _echo_stats(changes: List[Change], dry_run: bool) -> None:
+    files = sum(_.changed for _ in changes)
+    links = sum(_.links for _ in changes)
+    verb = "would change" if dry_run else "changed"
+    click.echo(f"{files} file(s) and {links} link(s) {verb}")
+
+
+def _process_files(
+    in_files: List[str], job: FileJob, jobs: int, timings: bool
+) -> List[Change]:
+    """Run the job over all files, in a process pool if jobs > 1.
+
+    The job (and whatever map it closes over) is shipped to each worker
+    once, through the pool initializer, instead of once per file.
+    """
+    started = time.perf_counter()
+    paths = [Path(_) for _ in in_files]
+
+    changes: List[Change]
+    if jobs > 1 and len(paths) > 1:
+        from multiprocessing import Pool
+
+        with Pool(jobs, initializer=_init_worker, initargs=(job,)) as pool:
+            chunksize = max(1, len(paths) // (jobs * 4))
+            reports = pool.imap_unordered(_run_job, paths, chunksize)
+            changes = _report(reports, timings)
+    else:
+        _init_worker(job)
+        changes = _report(map(_run_job, paths), timings)
+
+    if timings:
+        click.echo(
+            f"processed {len(paths)} file(s) with {min(jobs, len(paths))} "
+            f"job(s) in {time.perf_counter() - started:0.3f}s",
+            err=True,
+        )
+
+    return changes
+
+
+def _init_worker(job: FileJob) -> None:
+    global _WORKER_JOB
+    _WORKER_JOB = job
+
+
+def _run_job(path: Path) -> FileReport:
+    started = time.perf_counter()
+    change = cast(FileJob, _WORKER_JOB)(path)
+    return FileReport(
+        path=path.as_posix(),
+        elapsed=time.perf_counter() - started,
+        pid=os.getpid(),
+        change=change,
+    )
+
+
+def _report(reports: Iterable[FileReport], timings: bool) -> List[Change]:
+    changes = []
+    for report in reports:
+        if timings:
+            click.echo(
+                f"[{report.pid}] {report.path}: "
+                f"{report.elapsed * 1000:0.2f}ms",
+                err=True,
+            )
+        changes.append(report.change)
+    return changes
 
 
 def _process_file(
     args: Args,
     process_line: Callable[[Line], Iterable[str]],
-) -> None:
-    line_enum = enumerate(args.in_file.read_text().splitlines() or [""])
+    dry_run: bool = False,
+) -> Change:
+    """Process the file line by line, only writing it back if it changed."""
+    text = args.in_file.read_text()
+    line_enum = enumerate(text.splitlines() or [""])
     lines = (Line(_, idx) for idx, _ in line_enum)
-    args.out_file.write_text("\n".join(flatmap(process_line, lines)) + "\n")
+    new_lines = [(line.text, list(process_line(line))) for line in lines]
+    edited = any(new != [old] for old, new in new_lines)
+
+    if args.in_file == args.out_file and not edited:
+        return Change()
+
+    change = Change(
+        changed=True,
+        links=sum(
+            use_alias.count_changed_links(old, "\n".join(new))
+            for old, new in new_lines
+        ),
+    )
+    if not dry_run:
+        new_text = "\n".join(flatmap(lambda _: _[1], new_lines))
+        # keep the original (lack of a) trailing newline
+        if text.endswith("\n"):
+            new_text += "\n"
+        _atomic_write(args.out_file, new_text)
+    return change
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    """Write to a sibling temp file, then rename it over the target."""
+    tmp = NamedTemporaryFile(
+        "w", dir=path.parent, prefix=f".{path.name}.", delete=False
+    )
+    try:
+        with tmp:
+            tmp.write(text)
+        if path.exists():
+            shutil.copymode(path, tmp.name)
+        os.replace(tmp.name, path)
+    except BaseException:
+        # don't leave the temp file behind, whatever went wrong
+        os.unlink(tmp.name)
+        raise
@@ -1,3 +1,10 @@
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Set
+from unittest.mock import patch
+
 import pytest
 
 from der_py.clients import goodreads
@@ -16,3 +23,163 @@ def test_get_book_ratings(requests_mock, response, ratings):
     requests_mock.get(goodreads.RATINGS_API.format(book_id=1234), text=response)
     assert goodreads.get_book_ratings(1234) == ratings
     assert requests_mock.called
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fail_first: Dict[str, int] = {}
+    missing: Set[str] = set()
+    ports: List[int] = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.ports.append(self.client_address[1])
+            failures = self.fail_first.get(self.path, 0)
+            self.fail_first[self.path] = failures - 1
+        if failures > 0:
+            status, body = 503, b"busy"
+        elif self.path in self.missing:
+            status, body = 404, b"not found"
+        else:
+            book_id = self.path.strip("/")
+            status = 200
+            body = f"x\nrenderRatingGraph(\n[{book_id}, 0, 0, 0, 1],\n".encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    _StubHandler.fail_first = {}
+    _StubHandler.missing = set()
+    _StubHandler.ports = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, args=(0.01,), daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _fetcher(server, **kwargs):
+    api = f"http://127.0.0.1:{server.server_address[1]}/{{book_id}}"
+    return goodreads.SessionRatingFetcher(api=api, backoff=0.01, **kwargs)
+
+
+def test_session_fetcher_is_a_rating_fetcher(stub_server):
+    fetcher: goodreads.RatingFetcher
+    with _fetcher(stub_server) as fetcher:
+        assert fetcher(7) == [7, 0, 0, 0, 1]
+
+
+def test_session_fetcher_map_preserves_order_and_reuses_connections(
+    stub_server,
+):
+    book_ids = list(range(1, 41))
+    with _fetcher(stub_server, concurrency=4, rate=1000) as fetcher:
+        ratings = list(fetcher.map(book_ids))
+
+    assert [_[0] for _ in ratings] == book_ids
+    assert len(set(_StubHandler.ports)) <= 4
+
+
+def test_session_fetcher_map_unordered(stub_server):
+    with _fetcher(stub_server, concurrency=3, rate=1000) as fetcher:
+        res = dict(fetcher.map_unordered(range(1, 21)))
+
+    assert res == {_: [_, 0, 0, 0, 1] for _ in range(1, 21)}
+
+
+def test_session_fetcher_retries(stub_server):
+    _StubHandler.fail_first = {"/3": 2}
+    with _fetcher(stub_server, retries=2) as fetcher:
+        assert fetcher(3) == [3, 0, 0, 0, 1]
+
+
+def test_session_fetcher_gives_up(stub_server, caplog):
+    _StubHandler.fail_first = {"/3": 5}
+    with _fetcher(stub_server, retries=1) as fetcher:
+        assert fetcher(3) == []
+    assert "giving up on book ID 3" in caplog.text
+
+
+def test_session_fetcher_skips_failed_books(stub_server, caplog):
+    _StubHandler.missing = {"/2"}
+    with _fetcher(stub_server, concurrency=2, rate=1000) as fetcher:
+        res = dict(fetcher.map_unordered(range(1, 4)))
+
+    assert res == {1: [1, 0, 0, 0, 1], 2: [], 3: [3, 0, 0, 0, 1]}
+    assert "giving up on book ID 2" in caplog.text
+
+
+def test_token_bucket_limits_rate():
+    bucket = goodreads.TokenBucket(rate=100, burst=1)
+    started = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - started >= 0.045
+
+
+def test_rating_cache_roundtrip(tmp_path):
+    path = tmp_path / "ratings.sqlite3"
+    with goodreads.RatingCache(path) as cache:
+        cache.put_many({1: [5, 4, 3, 2, 1], 2: [0, 0, 0, 0, 0], 3: []})
+
+    with goodreads.RatingCache(path) as cache:
+        assert cache.get_many([1, 2, 3]) == {
+            "1": [5, 4, 3, 2, 1],
+            "2": [0, 0, 0, 0, 0],
+        }
+        assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_rating_cache_expires(tmp_path):
+    with goodreads.RatingCache(tmp_path / "c", ttl=60) as cache:
+        cache.put_many({1: [1]})
+        with patch("time.time", return_value=time.time() + 61):
+            assert cache.get_many([1]) == {}
+
+
+def test_rating_cache_evicts_least_recently_used(tmp_path):
+    with goodreads.RatingCache(tmp_path / "c", max_entries=2) as cache:
+        cache.put_many({1: [1], 2: [2]})
+        with patch("time.time", return_value=time.time() + 1):
+            cache.get_many([1])
+        with patch("time.time", return_value=time.time() + 2):
+            cache.put_many({3: [3]})
+        assert cache.get_many([1, 2, 3]) == {"1": [1], "3": [3]}
+
+
+def test_get_book_ratings_stops_reading_early(requests_mock, caplog):
+    page = b"head\nrenderRatingGraph(\n[5, 4, 3, 2, 1],\n" + b"x" * 10 ** 6
+    requests_mock.get(goodreads.RATINGS_API.format(book_id=1), content=page)
+
+    with caplog.at_level(logging.DEBUG, logger=goodreads.__name__):
+        assert goodreads.get_book_ratings(1) == [5, 4, 3, 2, 1]
+
+    (record,) = caplog.records
+    read = int(record.getMessage().split()[1])
+    assert 0 < read <= goodreads.CHUNK_SIZE
+
+
+@pytest.mark.parametrize(
+    "chunks, lines",
+    [
+        ([], []),
+        ([b"a\nb"], ["a", "b"]),
+        ([b"a", b"b\n", b"c\n"], ["ab", "c"]),
+        ([b"\n\n"], ["", ""]),
+    ],
+)
+def test_byte_counter_lines(chunks, lines):
+    counter = goodreads._ByteCounter(chunks)
+    assert list(counter.lines()) == lines
+    assert counter.total == sum(map(len, chunks))
@@ -0,0 +1,85 @@
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+from der_py.clients import page_buffer, wiki
+from der_py.clients.page_buffer import PageBuffer, default_buffer_path
+
+
+@pytest.fixture
+def buffer(tmp_path):
+    return PageBuffer(tmp_path / "pages.sqlite3", capacity=3)
+
+
+def _page(idx):
+    return wiki.Page(title=f"title {idx}", extract=f"extract {idx}")
+
+
+def test_pop_empty(buffer):
+    assert buffer.pop("en") is None
+
+
+def test_push_pop_is_fifo_per_language(buffer):
+    buffer.push("en", [_page(1), _page(2)])
+    buffer.push("de", [_page(3)])
+
+    assert buffer.pop("en") == _page(1)
+    assert buffer.pop("en") == _page(2)
+    assert buffer.pop("en") is None
+    assert buffer.pop("de") == _page(3)
+
+
+def test_push_is_bounded(buffer):
+    buffer.push("en", [_page(_) for _ in range(5)])
+    assert buffer.size("en") == 3
+    assert buffer.pop("en") == _page(2)
+
+
+def test_refill(buffer, mock_wiki_get):
+    buffer.push("ro", [_page(1)])
+    assert buffer.needs_refill("ro")
+
+    assert buffer.refill("ro") == 2
+    assert buffer.size("ro") == 3
+    assert not buffer.needs_refill("ro")
+    assert mock_wiki_get.call_count == 2
+    assert mock_wiki_get.last_request.hostname == "ro.wikipedia.org"
+
+
+def test_default_buffer_path_honors_xdg(tmp_path):
+    assert default_buffer_path().is_relative_to(tmp_path)
+
+
+def test_refill_is_skipped_while_locked(buffer, mock_wiki_get):
+    with page_buffer._refill_lock(buffer.path) as locked:
+        assert locked
+        assert buffer.refill("ro") == 0
+        with page_buffer._refill_lock(buffer.path) as nested:
+            assert not nested
+    assert mock_wiki_get.call_count == 0
+
+    assert buffer.refill("ro") == 3
+
+
+def test_spawn_refill_is_skipped_while_locked(monkeypatch):
+    popen = MagicMock()
+    monkeypatch.setattr(page_buffer.subprocess, "Popen", popen)
+    path = default_buffer_path()
+    PageBuffer(path)
+
+    with page_buffer._refill_lock(path):
+        page_buffer.spawn_refill("en", 5)
+    popen.assert_not_called()
+
+    page_buffer.spawn_refill("en", 5)
+    popen.assert_called_once()
+    assert "--buffer-size=5" in popen.call_args.args[0]
+
+
+def test_refill_lock_is_a_noop_without_fcntl(buffer, monkeypatch):
+    monkeypatch.setitem(sys.modules, "fcntl", None)
+    with page_buffer._refill_lock(buffer.path) as locked:
+        assert locked
+        with page_buffer._refill_lock(buffer.path) as nested:
+            assert nested
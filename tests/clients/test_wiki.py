@@ -1,5 +1,7 @@
 import click
 import pytest
+import requests
+from requests_mock import ANY as ANY_URL
 
 from der_py.clients import wiki
 
@@ -17,3 +19,26 @@ def test_random_page_returns_page(mock_wiki_get):
 def test_random_page_handles_validation_errors(mock_wiki_get_bad_json):
     with pytest.raises(click.ClickException):
         wiki.random_page()
+
+
+def test_random_pages_returns_pages(mock_wiki_get):
+    pages = list(wiki.random_pages(5, language="de", concurrency=2))
+    assert len(pages) == 5
+    assert all(isinstance(_, wiki.Page) for _ in pages)
+    assert mock_wiki_get.call_count == 5
+    assert mock_wiki_get.last_request.hostname == "de.wikipedia.org"
+
+
+def test_random_pages_reports_failures_per_item(requests_mock):
+    requests_mock.get(
+        ANY_URL,
+        [
+            {"json": {"title": "Lorem Ipsum", "extract": "Lorem ipsum"}},
+            {"json": "random"},
+            {"exc": requests.RequestException},
+        ],
+    )
+    pages = list(wiki.random_pages(3, concurrency=1))
+
+    assert sum(isinstance(_, wiki.Page) for _ in pages) == 1
+    assert sum(isinstance(_, click.ClickException) for _ in pages) == 2
@@ -1,10 +1,15 @@
+import io
 import json
-from datetime import timedelta
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 from enum import Enum, auto
+from unittest.mock import Mock
+from uuid import UUID
 
 import pytest
 
-from der_py.codegen.encoder import DUMP
+from der_py.codegen.encoder import DUMP, Encoder, dump_to
 
 
 class _Foo(Enum):
@@ -19,6 +24,16 @@ class _Bar:
         return {"it's": self.amazing}
 
 
+@dataclass
+class _Baz:
+    name: str
+    when: date
+
+
+class _Money(Decimal):
+    pass
+
+
 @pytest.mark.parametrize(
     "to_encode, expected",
     [
@@ -38,12 +53,31 @@ class _Bar:
             {"deltas": timedelta(days=10, seconds=17)},
             {"deltas": "10 days, 0:00:17"},
         ),
+        (
+            {"at": datetime(2021, 1, 2, 3, 4, 5), "on": date(2021, 1, 2)},
+            {"at": "2021-01-02T03:04:05", "on": "2021-01-02"},
+        ),
+        ({"price": Decimal("1.10")}, {"price": "1.10"}),
+        (
+            {"id": UUID(int=1)},
+            {"id": "00000000-0000-0000-0000-000000000001"},
+        ),
+        (
+            {"baz": _Baz("qux", date(2021, 1, 2))},
+            {"baz": {"name": "qux", "when": "2021-01-02"}},
+        ),
+        ({"price": _Money("2.5")}, {"price": "2.5"}),
     ],
     ids=[
         "trivial",
         "supports-enum",
         "supports-dictable-models",
         "supports-timedelta",
+        "supports-datetime",
+        "supports-decimal",
+        "supports-uuid",
+        "supports-dataclasses",
+        "supports-subclasses",
     ],
 )
 def test_dump(to_encode, expected):
@@ -54,3 +88,77 @@ def test_dump_raises():
     """Should raise when encountering random objects."""
     with pytest.raises(TypeError):
         DUMP({"foo": object()})
+
+
+def test_register_on_subclass():
+    """Should only affect the subclass it was registered on."""
+
+    class _Encoder(Encoder):
+        pass
+
+    _Encoder.register(Decimal, float)
+    assert json.loads(json.dumps(Decimal("1.5"), cls=_Encoder)) == 1.5
+    assert json.loads(json.dumps(_Money("1.5"), cls=_Encoder)) == 1.5
+    assert json.loads(DUMP(Decimal("1.5"))) == "1.5"
+    assert Encoder.resolve(Decimal) is str
+
+
+def test_register_invalidates_subclasses():
+    """Should pick up handlers registered on a parent after first use."""
+
+    class _Parent(Encoder):
+        pass
+
+    class _Child(_Parent):
+        pass
+
+    assert _Child.resolve(complex) is None
+    _Parent.register(complex, str)
+    assert json.loads(json.dumps(1j, cls=_Child)) == "1j"
+
+
+def test_resolve_is_cached():
+    """Should look the handler up once per type."""
+
+    class _Encoder(Encoder):
+        pass
+
+    class _Cents(_Money):
+        pass
+
+    assert _Encoder.resolve(_Cents) is _Encoder.resolve(_Cents) is str
+    assert _Cents in _Encoder._dispatch
+    assert _Cents not in Encoder._dispatch
+
+
+_DOCUMENT = {
+    "enums": [_Foo.bar] * 100,
+    "nested": {"deltas": [timedelta(seconds=_) for _ in range(100)]},
+    "dictable": _Bar(),
+}
+
+
+def test_dump_to():
+    """Should write the same document as DUMP."""
+    out = io.StringIO()
+    dump_to(out, _DOCUMENT)
+    assert out.getvalue() == DUMP(_DOCUMENT)
+
+
+def test_dump_to_compact():
+    """Should write no whitespace in compact mode."""
+    out = io.StringIO()
+    dump_to(out, _DOCUMENT, compact=True)
+    assert out.getvalue() == json.dumps(
+        _DOCUMENT, cls=Encoder, sort_keys=True, separators=(",", ":")
+    )
+
+
+def test_dump_to_writes_in_chunks():
+    """Should write chunks of about chunk_size, not every encoded piece."""
+    out = Mock(spec=io.StringIO)
+    dump_to(out, _DOCUMENT, chunk_size=1024)
+    chunks = [_.args[0] for _ in out.write.call_args_list]
+    assert "".join(chunks) == DUMP(_DOCUMENT)
+    assert all(len(_) >= 1024 for _ in chunks[:-1])
+    assert len(chunks) == len(DUMP(_DOCUMENT)) // 1024 + 1
@@ -0,0 +1,95 @@
+import io
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+from enum import Enum
+from json import JSONEncoder
+from typing import Any
+from uuid import UUID
+
+import pytest
+
+from der_py.codegen.encoder import DUMP, Encoder, IntoDict, dump_to
+
+N_OBJECTS = 1_000_000
+
+
+class _Color(Enum):
+    red = 1
+
+
+class _Dictable:
+    def dict(self) -> dict:
+        return {"a": 1}
+
+
+class _LegacyEncoder(JSONEncoder):
+    """The isinstance chain Encoder.default used to run for every object."""
+
+    def default(self, obj: Any) -> Any:
+        if isinstance(obj, Enum):
+            return str(obj)
+        if isinstance(obj, timedelta):
+            return str(obj)
+        if isinstance(obj, IntoDict):
+            return obj.dict()
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        if isinstance(obj, (Decimal, UUID)):
+            return str(obj)
+        return JSONEncoder.default(self, obj)
+
+
+@pytest.mark.benchmark
+def test_dispatch_vs_isinstance_chain():
+    kinds = [
+        _Color.red,
+        timedelta(seconds=1),
+        _Dictable(),
+        datetime(2021, 1, 2),
+        Decimal("1.5"),
+        UUID(int=1),
+    ]
+    objects = [kinds[idx % len(kinds)] for idx in range(N_OBJECTS)]
+
+    started = time.perf_counter()
+    legacy = json.dumps(objects, cls=_LegacyEncoder)
+    legacy_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    dispatched = json.dumps(objects, cls=Encoder)
+    dispatch_time = time.perf_counter() - started
+
+    assert dispatched == legacy
+    print(
+        f"\n{N_OBJECTS} objects: isinstance chain {legacy_time:0.3f}s, "
+        f"dispatch {dispatch_time:0.3f}s "
+        f"({legacy_time / dispatch_time:0.1f}x)"
+    )
+
+
+@pytest.mark.benchmark
+def test_dump_to_peak_memory():
+    document = {str(idx): {"values": list(range(50))} for idx in range(20_000)}
+
+    tracemalloc.start()
+    with open(os.devnull, "w") as out:
+        out.write(DUMP(document))
+    _, dump_peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    with open(os.devnull, "w") as out:
+        dump_to(out, document)
+    _, stream_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    streamed = io.StringIO()
+    dump_to(streamed, document)
+    assert streamed.getvalue() == DUMP(document)
+    assert stream_peak < dump_peak / 10
+    print(
+        f"\npeak memory: DUMP {dump_peak / 2**20:0.1f}MiB, "
+        f"dump_to {stream_peak / 2**20:0.1f}MiB"
+    )
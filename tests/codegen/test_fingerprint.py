@@ -0,0 +1,149 @@
+from types import SimpleNamespace
+
+import pytest
+
+from der_py.codegen.fingerprint import diff, digest_tree, fingerprint
+
+
+class Dictable:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    def dict(self) -> dict:
+        return self.kwargs
+
+
+def _obj(**overrides):
+    fields = {
+        "name": "foo",
+        "sizes": [1, 2, 3],
+        "tags": {"b", "a"},
+        "nested": {"deep": {"value": 42, "other": range(2)}},
+        "model": Dictable(title="bar", count=1),
+    }
+    return SimpleNamespace(**{**fields, **overrides})
+
+
+def test_fingerprint_is_stable():
+    assert fingerprint(_obj()) == fingerprint(_obj())
+    assert len(fingerprint(_obj())) == 40
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"name": "baz"},
+        {"sizes": [1, 2]},
+        {"tags": {"a"}},
+        {"nested": {"deep": {"value": 43, "other": range(2)}}},
+        {"model": Dictable(title="bar", count=2)},
+        {"extra": "field"},
+        {"name": 1},
+    ],
+    ids=["base", "list", "set", "nested", "dictable", "added", "retyped"],
+)
+def test_fingerprint_changes(overrides):
+    assert fingerprint(_obj(**overrides)) != fingerprint(_obj())
+
+
+def test_fingerprint_ignores_what_repr_object_ignores():
+    assert fingerprint(_obj(ignored=None)) == fingerprint(_obj())
+
+
+def test_fingerprint_is_unambiguous():
+    assert fingerprint(SimpleNamespace(a="b", c="d")) != fingerprint(
+        SimpleNamespace(a="bc", c="d")
+    )
+    assert fingerprint(SimpleNamespace(a=["1", "2"])) != fingerprint(
+        SimpleNamespace(a=["12"])
+    )
+    assert fingerprint(SimpleNamespace(a={})) != fingerprint(
+        SimpleNamespace(a=())
+    )
+    assert fingerprint(SimpleNamespace(a=range(2))) != fingerprint(
+        SimpleNamespace(a=(0, 1))
+    )
+
+
+class Plain:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class Slotted:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+def test_fingerprint_hashes_items_by_structure():
+    assert fingerprint(SimpleNamespace(a=[{"x": 1, "y": 2}])) == fingerprint(
+        SimpleNamespace(a=[{"y": 2, "x": 1}])
+    )
+    assert fingerprint(SimpleNamespace(a=[{"x": 1}])) != fingerprint(
+        SimpleNamespace(a=[{"x": 2}])
+    )
+    assert fingerprint(SimpleNamespace(a=({1, 2},))) == fingerprint(
+        SimpleNamespace(a=({2, 1},))
+    )
+
+
+def test_fingerprint_ignores_object_addresses():
+    assert fingerprint(SimpleNamespace(a=[Plain(x=1)])) == fingerprint(
+        SimpleNamespace(a=[Plain(x=1)])
+    )
+    assert fingerprint(SimpleNamespace(a=[Plain(x=1)])) != fingerprint(
+        SimpleNamespace(a=[Plain(x=2)])
+    )
+    assert fingerprint(SimpleNamespace(a=[Slotted(1)])) == fingerprint(
+        SimpleNamespace(a=[Slotted(1)])
+    )
+
+
+def test_fingerprint_detects_cycles_through_items():
+    items = []
+    items.append(items)
+    with pytest.raises(ValueError, match="Circular reference"):
+        fingerprint(SimpleNamespace(a=items))
+
+    obj = Plain()
+    obj.items = [obj]
+    with pytest.raises(ValueError, match="Circular reference"):
+        fingerprint(SimpleNamespace(a=[obj]))
+
+
+def test_fingerprint_is_the_digest_tree_root():
+    assert fingerprint(_obj()) == digest_tree(_obj()).hex()
+
+
+def test_digest_tree_shares_subtrees():
+    shared = {"value": 1}
+    tree = digest_tree(SimpleNamespace(a=shared, b={"c": shared}))
+    assert tree.children["a"] is tree.children["b"].children["c"]
+
+
+def test_diff_equal():
+    assert list(diff(digest_tree(_obj()), digest_tree(_obj()))) == []
+
+
+def test_diff_localizes_changes():
+    before = digest_tree(_obj())
+    after = digest_tree(
+        _obj(
+            nested={"deep": {"value": 43, "other": range(2)}},
+            model=Dictable(title="baz", count=1),
+            name="bar",
+        )
+    )
+    assert sorted(diff(before, after), key=str) == [
+        ("model", "title"),
+        ("name",),
+        ("nested", "deep", "value"),
+    ]
+
+
+def test_diff_added_and_removed_keys():
+    before = digest_tree(SimpleNamespace(a={"b": 1, "c": 2}))
+    after = digest_tree(SimpleNamespace(a={"b": 1, "d": 2}))
+    assert list(diff(before, after)) == [("a", "c"), ("a", "d")]
@@ -0,0 +1,79 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import pytest
+from desert import schema
+from marshmallow import EXCLUDE, ValidationError
+
+from der_py.codegen.loader import compile_loader
+
+
+@dataclass(frozen=True)
+class _Simple:
+    title: str
+    extract: str
+
+
+@dataclass(frozen=True)
+class _WithDefaults:
+    title: str
+    lang: str = "en"
+    tag: str = field(default_factory=lambda: "none")
+
+
+@dataclass(frozen=True)
+class _NotSimple:
+    title: str
+    count: int
+
+
+@dataclass(frozen=True)
+class _Nullable:
+    title: Optional[str] = None
+
+
+def _marshmallow_load(of, data):
+    return schema(of, meta={"unknown": EXCLUDE}).load(data)
+
+
+def _outcome(load, data):
+    try:
+        return "ok", load(data)
+    except ValidationError as err:
+        return "error", err.messages, err.valid_data, err.data
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"title": "t", "extract": "e"},
+        {"title": "t", "extract": "e", "unknown": 42},
+        {"title": b"t", "extract": "e"},
+        {"title": b"\xff", "extract": "e"},
+        {"title": 1, "extract": None},
+        {"title": "t"},
+        {"extract": ["e"]},
+        {"lang": "ro"},
+        {"title": "t", "lang": None},
+        {},
+        "random",
+        ["title"],
+        None,
+    ],
+)
+@pytest.mark.parametrize("of", [_Simple, _WithDefaults])
+def test_compiled_loader_matches_marshmallow(of, data):
+    loader = compile_loader(of)
+    assert _outcome(loader.load, data) == _outcome(
+        lambda _: _marshmallow_load(of, _), data
+    )
+
+
+@pytest.mark.parametrize("of", [_NotSimple, _Nullable, dict, List[str]])
+def test_compile_loader_refuses_non_simple_types(of):
+    assert compile_loader(of) is None
+
+
+def test_compile_loader_caches_per_type():
+    assert compile_loader(_Simple) is compile_loader(_Simple)
+    assert compile_loader(_Simple) is not compile_loader(_WithDefaults)
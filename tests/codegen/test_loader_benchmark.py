@@ -0,0 +1,34 @@
+import time
+
+import pytest
+from desert import schema
+from marshmallow import EXCLUDE
+
+from der_py.clients.wiki import Page
+from der_py.codegen.loader import compile_loader
+
+N_LOADS = 100_000
+
+
+@pytest.mark.benchmark
+def test_compiled_loader_vs_marshmallow():
+    data = {"title": "Lorem Ipsum", "extract": "Lorem ipsum", "extra": 1}
+    marshmallow_schema = schema(Page, meta={"unknown": EXCLUDE})
+    loader = compile_loader(Page)
+
+    started = time.perf_counter()
+    for _ in range(N_LOADS):
+        marshmallow_schema.load(data)
+    marshmallow_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(N_LOADS):
+        loader.load(data)
+    compiled_time = time.perf_counter() - started
+
+    assert loader.load(data) == marshmallow_schema.load(data)
+    print(
+        f"\n{N_LOADS} loads: marshmallow {marshmallow_time:0.3f}s, "
+        f"compiled {compiled_time:0.3f}s "
+        f"({marshmallow_time / compiled_time:0.1f}x)"
+    )
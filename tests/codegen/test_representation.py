@@ -1,9 +1,16 @@
+import sys
 from collections import OrderedDict
+from datetime import timedelta
 from types import SimpleNamespace
 
 import pytest
 
-from der_py.codegen.representation import repr_object
+from der_py.codegen.encoder import IntoDict
+from der_py.codegen.representation import (
+    _repr_base,
+    _repr_iterable,
+    repr_object,
+)
 
 
 class Dictable:
@@ -64,3 +71,83 @@ class Dictable:
 )
 def test_can_represent_base_types(in_obj, expected):
     assert repr_object(in_obj) == expected
+
+
+class _Counting(Dictable):
+    calls = 0
+
+    def dict(self) -> dict:
+        type(self).calls += 1
+        return {"nested": {"deeper": super().dict()}}
+
+
+def _legacy_repr_object(o):
+    """The recursive implementation repr_object replaced."""
+    return _legacy_repr_mapping(o.dict() if hasattr(o, "dict") else o.__dict__)
+
+
+def _legacy_repr_mapping(m):
+    groups = [
+        ((dict,), _legacy_repr_mapping),
+        ((int, float, complex, range, bytes, str, timedelta), _repr_base),
+        ((list, tuple, set, frozenset), _repr_iterable),
+    ]
+    represented = {}
+    for types, reprer in groups:
+        for k in sorted(k for k, v in m.items() if isinstance(v, types)):
+            represented[k] = reprer(m[k])
+    for k in sorted(k for k, v in m.items() if isinstance(v, IntoDict)):
+        represented[k] = _legacy_repr_object(m[k])
+    return represented
+
+
+def test_matches_recursive_implementation():
+    shared = {"b": [3, 2], "a": {"z": range(2), "y": {1, 0}}}
+    in_obj = SimpleNamespace(
+        one=shared,
+        two={"again": shared, "dictable": Dictable(), "none": None},
+        three=Dictable(),
+        delta=timedelta(seconds=3),
+        ignored=object(),
+        truthy=True,
+    )
+
+    represented = repr_object(in_obj)
+
+    assert represented == _legacy_repr_object(in_obj)
+    assert list(represented) == list(_legacy_repr_object(in_obj))
+
+
+def test_represents_deep_graphs():
+    in_obj = SimpleNamespace(child={})
+    leaf = in_obj.child
+    for _ in range(sys.getrecursionlimit() * 2):
+        leaf["child"] = {}
+        leaf = leaf["child"]
+    leaf["value"] = 42
+
+    represented = repr_object(in_obj)
+
+    for _ in range(sys.getrecursionlimit() * 2 + 1):
+        represented = represented["child"]
+    assert represented == {"value": "42"}
+
+
+def test_represents_shared_objects_once():
+    _Counting.calls = 0
+    shared = _Counting()
+    in_obj = SimpleNamespace(a=shared, b=[shared], c={"d": shared})
+
+    represented = repr_object(in_obj)
+
+    assert represented["a"] == represented["c"]["d"]
+    assert represented["a"] == {"nested": {"deeper": {"it's": "amazing"}}}
+    assert _Counting.calls == 1
+
+
+def test_detects_cycles():
+    in_obj = SimpleNamespace(loop={})
+    in_obj.loop["back"] = {"to": in_obj.loop}
+
+    with pytest.raises(ValueError, match="Circular reference"):
+        repr_object(in_obj)
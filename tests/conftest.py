@@ -8,6 +8,13 @@ from requests_mock import ANY as ANY_URL
 
 def pytest_configure(config):
     config.addinivalue_line("markers", "e2e: end-to-end test")
+    config.addinivalue_line("markers", "benchmark: slow performance benchmark")
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache_home(tmp_path, monkeypatch):
+    """Keep on-disk caches out of the real home directory."""
+    monkeypatch.setenv("XDG_CACHE_HOME", (tmp_path / "cache").as_posix())
 
 
 @pytest.fixture
@@ -17,9 +24,10 @@ def runner():
 
 @pytest.fixture
 def mock_pool():
-    """Good for mocking multiprocessing/dummy Pool.map"""
+    """Good for mocking multiprocessing/dummy Pool.map/imap_unordered"""
     _pool = MagicMock()
     _pool.return_value.__enter__.return_value.map = map
+    _pool.return_value.__enter__.return_value.imap_unordered = map
     return _pool
 
 
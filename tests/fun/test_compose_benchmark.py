@@ -0,0 +1,64 @@
+import time
+from functools import reduce
+
+import pytest
+
+from der_py.fun import compose
+
+N_CALLS = 1_000_000
+
+
+def _legacy_compose(*functions):
+    """The nested lambda composition compose replaced."""
+    return reduce(lambda f, g: lambda x: f(g(x)), functions[::-1], lambda x: x)
+
+
+def _time(fn):
+    started = time.perf_counter()
+    for idx in range(N_CALLS):
+        fn(idx)
+    return time.perf_counter() - started
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("n_functions", [1, 3, 10, 100])
+def test_compose_vs_nested_lambdas(n_functions):
+    functions = [abs] * n_functions
+    legacy = _legacy_compose(*functions)
+    flattened = compose(*functions)
+
+    assert [legacy(_) for _ in range(-5, 5)] == [
+        flattened(_) for _ in range(-5, 5)
+    ]
+    legacy_time = _time(legacy)
+    flattened_time = _time(flattened)
+    print(
+        f"\n{N_CALLS} calls of {n_functions} function(s): "
+        f"nested lambdas {legacy_time:0.3f}s, "
+        f"flattened {flattened_time:0.3f}s "
+        f"({legacy_time / flattened_time:0.1f}x)"
+    )
+
+
+N_COMPOSITIONS = 100_000
+
+
+def _time_composing(compose_fn, functions):
+    started = time.perf_counter()
+    for _ in range(N_COMPOSITIONS):
+        compose_fn(*functions)
+    return time.perf_counter() - started
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("n_functions", [3, 10, 100])
+def test_compose_construction_cost(n_functions):
+    functions = [abs] * n_functions
+    legacy_time = _time_composing(_legacy_compose, functions)
+    flattened_time = _time_composing(compose, functions)
+    print(
+        f"\n{N_COMPOSITIONS} compositions of {n_functions} function(s): "
+        f"nested lambdas {legacy_time:0.3f}s, "
+        f"flattened {flattened_time:0.3f}s "
+        f"({legacy_time / flattened_time:0.1f}x)"
+    )
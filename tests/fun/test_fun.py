@@ -1,3 +1,4 @@
+import sys
 from operator import itemgetter
 
 import pytest
@@ -10,6 +11,7 @@ from der_py.fun import (
     key_by,
     mask_dict,
     pairwise,
+    reduce_by,
     scrub,
     slice_dict,
     split_by,
@@ -180,3 +182,38 @@ def test_pairwise(xs, res):
 )
 def test_compose(fns, arg, res):
     assert compose(*fns)(arg) == res
+
+
+def test_compose_fuses_nested_compositions():
+    inner = compose(str.lower, str.strip)
+    outer = compose(str.upper, inner, compose(), str.title)
+    assert outer.functions == (str.upper, str.lower, str.strip, str.title)
+    assert outer(" aAa ") == "Aaa"
+
+
+def test_compose_long_pipelines():
+    pipeline = compose(*[lambda _: _ + 1] * 10 * sys.getrecursionlimit())
+    assert pipeline(0) == 10 * sys.getrecursionlimit()
+
+
+def test_compose_single_function():
+    assert compose(compose(str.lower)) is str.lower
+
+
+@pytest.mark.parametrize(
+    "seq, initial, res",
+    [
+        ("", (), {}),
+        ("aBAb", (), {"a": "aA", "b": "Bb"}),
+        ("aBAb", ("-",), {"a": "-aA", "b": "-Bb"}),
+    ],
+)
+def test_reduce_by(seq, initial, res):
+    assert reduce_by(str.lower, lambda acc, x: acc + x, seq, *initial) == res
+
+
+def test_reduce_by_counts():
+    assert reduce_by(len, lambda acc, _: acc + 1, ["a", "bb", "c"], 0) == {
+        1: 2,
+        2: 1,
+    }
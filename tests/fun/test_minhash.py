@@ -0,0 +1,101 @@
+import pytest
+
+from der_py.fun import jaccard
+from der_py.fun.minhash import LSHIndex, MinHasher, near_duplicates
+
+np = pytest.importorskip("numpy")
+
+
+def _words(text):
+    return set(text.split())
+
+
+def test_signature_estimates_jaccard():
+    left = set(range(1000))
+    right = set(range(500, 1500))
+    hasher = MinHasher(num_perm=256)
+    estimate = hasher.signature(left).jaccard(hasher.signature(right))
+    assert estimate == pytest.approx(jaccard(left, right), abs=0.1)
+
+
+def test_signatures_match_single_signatures():
+    docs = [{"a", "b"}, set(), {"c"}, {"a", "b", "c", "d"}]
+    hasher = MinHasher()
+    batched = hasher.signatures(docs)
+    assert len(batched) == len(docs)
+    for doc, signature in zip(docs, batched):
+        assert np.array_equal(signature.values, hasher.signature(doc).values)
+
+
+def test_signatures_are_stable():
+    tokens = {"foo", "bar", 42}
+    assert np.array_equal(
+        MinHasher(seed=3).signature(tokens).values,
+        MinHasher(seed=3).signature(tokens).values,
+    )
+    assert MinHasher().signature(tokens).jaccard(
+        MinHasher().signature(list(tokens) * 2)
+    ) == pytest.approx(1.0)
+
+
+def test_signatures_of_different_lengths():
+    with pytest.raises(ValueError):
+        MinHasher(16).signature({"a"}).jaccard(MinHasher(32).signature({"a"}))
+
+
+@pytest.mark.parametrize("threshold", [0.3, 0.5, 0.8, 1.0])
+def test_lsh_bands(threshold):
+    index = LSHIndex(threshold)
+    assert index.bands * index.rows <= index.num_perm
+
+
+def test_lsh_query():
+    hasher = MinHasher()
+    index = LSHIndex(threshold=0.5)
+    docs = {
+        "fox": "the quick brown fox jumps over the lazy dog",
+        "cat": "the quick brown cat jumps over the lazy dog",
+        "lorem": "lorem ipsum dolor sit amet consectetur adipiscing elit",
+    }
+    for key, doc in docs.items():
+        index.insert(key, hasher.signature(_words(doc)))
+
+    found = index.query(hasher.signature(_words(docs["fox"])))
+    assert [_[0] for _ in found] == ["fox", "cat"]
+    assert found[0][1] == 1.0
+    assert index.query(hasher.signature({"unrelated"})) == []
+    assert len(index) == 3
+
+
+def test_lsh_insert_invalid():
+    index = LSHIndex(num_perm=64)
+    with pytest.raises(ValueError):
+        index.insert("foo", MinHasher(num_perm=32).signature({"a"}))
+    index.insert("foo", MinHasher(num_perm=64).signature({"a"}))
+    with pytest.raises(ValueError):
+        index.insert("foo", MinHasher(num_perm=64).signature({"a"}))
+    with pytest.raises(ValueError):
+        LSHIndex(threshold=0)
+
+
+def test_candidate_pairs_are_unique():
+    hasher = MinHasher()
+    index = LSHIndex()
+    for key in "abc":
+        index.insert(key, hasher.signature({"same", "tokens"}))
+    assert sorted(index.candidate_pairs()) == [
+        ("a", "b"),
+        ("a", "c"),
+        ("b", "c"),
+    ]
+
+
+def test_near_duplicates():
+    docs = {
+        idx: {f"word{_}" for _ in range(idx * 100, idx * 100 + 50)}
+        for idx in range(20)
+    }
+    docs["copy"] = set(docs[3]) | {"extra"}
+    assert list(near_duplicates(docs, threshold=0.9)) == [
+        (3, "copy", pytest.approx(50 / 51))
+    ]
@@ -0,0 +1,53 @@
+import random
+import time
+
+import pytest
+
+from der_py.fun.minhash import LSHIndex, MinHasher
+
+N_DOCS = 100_000
+
+
+def _corpus(n, seed=0):
+    """Random 20-word documents, every tenth one a near-copy of another."""
+    rng = random.Random(seed)
+    vocabulary = [f"w{_}" for _ in range(50_000)]
+    docs = []
+    for idx in range(n):
+        if idx % 10 == 9:
+            doc = set(docs[rng.randrange(idx)])
+            doc.discard(next(iter(doc)))
+            doc.add(rng.choice(vocabulary))
+        else:
+            doc = set(rng.sample(vocabulary, 20))
+        docs.append(doc)
+    return docs
+
+
+def _candidates(docs):
+    hasher = MinHasher()
+    index = LSHIndex(threshold=0.8)
+    started = time.perf_counter()
+    for key, signature in enumerate(hasher.signatures(docs)):
+        index.insert(key, signature)
+    pairs = sum(1 for _ in index.candidate_pairs())
+    return time.perf_counter() - started, pairs
+
+
+@pytest.mark.benchmark
+def test_lsh_is_sub_quadratic():
+    pytest.importorskip("numpy")
+    docs = _corpus(N_DOCS)
+
+    quarter_time, quarter_pairs = _candidates(docs[: N_DOCS // 4])
+    full_time, full_pairs = _candidates(docs)
+
+    # quadrupling the corpus would take 16x as long for all-pairs
+    assert full_time / quarter_time < 8
+    assert full_pairs < N_DOCS
+    print(
+        f"\n{N_DOCS // 4} docs: {quarter_time:0.2f}s, "
+        f"{quarter_pairs} candidate pairs; "
+        f"{N_DOCS} docs: {full_time:0.2f}s, {full_pairs} candidate pairs "
+        f"(of {N_DOCS * (N_DOCS - 1) // 2} possible)"
+    )
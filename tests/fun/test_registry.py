@@ -1,13 +1,22 @@
+import asyncio
+import threading
+import time
 from dataclasses import dataclass
 from typing import Tuple, Type, TypeVar, cast
 
 import pytest
 
+from der_py.fun import registry
 from der_py.fun.registry import (
+    PER_THREAD,
+    POOLED,
+    SINGLETON,
     client as client_ctx,
     deregister,
     inject,
     register,
+    register_factory,
+    scope,
 )
 
 K = TypeVar("K")
@@ -113,3 +122,400 @@ def test_context_manager(_client_factory):
         assert isinstance(_client, _type)
         assert _instance == _client
         assert _instance.attr == 17
+
+
+def test_inject_sees_registry_changes(_client_factory):
+    _type, _instance = _client_factory("ChangingClient", 1)
+
+    @inject(_type)
+    def wrapped(**kwargs):
+        return kwargs
+
+    assert wrapped() == {}
+    register(_type, _instance)
+    assert wrapped() == {"client": _instance}
+    _other = _type(2)
+    register(_type, _other)
+    assert wrapped() == {"client": _other}
+    deregister(_type)
+    assert wrapped() == {}
+
+
+def test_inject_kwargs_override_clients(_client_factory):
+    _type, _instance = _client_factory("OverriddenClient", 1)
+    register(_type, _instance)
+
+    @inject(_type)
+    def wrapped(**kwargs):
+        return kwargs
+
+    assert wrapped(client="mock")["client"] == "mock"
+    assert wrapped()["client"] is _instance
+    deregister(_type)
+
+
+def test_inject_does_not_leak_cached_clients(_client_factory):
+    _type, _instance = _client_factory("MutatedClient", 1)
+    register(_type, _instance)
+
+    @inject(_type)
+    def wrapped(**kwargs):
+        kwargs.pop("client")
+        return kwargs
+
+    assert wrapped() == {}
+    assert wrapped() == {}
+    deregister(_type)
+
+
+def test_scope_shadows_global_registry(_client_factory):
+    _type, _global = _client_factory("ShadowedClient", 1)
+    _scoped = _type(2)
+    register(_type, _global)
+
+    @inject(_type)
+    def wrapped(client):
+        return client
+
+    with scope():
+        assert wrapped() is _global
+        register(_type, _scoped)
+        assert wrapped() is _scoped
+        with scope():
+            assert wrapped() is _scoped
+            deregister(_type)
+            assert wrapped() is _global
+        assert wrapped() is _scoped
+    assert wrapped() is _global
+    deregister(_type)
+
+
+def test_scope_deregister_only_scoped(_client_factory):
+    _type, _instance = _client_factory("GlobalOnlyClient", 1)
+    register(_type, _instance)
+    with scope(), pytest.raises(ValueError):
+        deregister(_type)
+    deregister(_type)
+
+
+def test_context_manager_is_scoped(_client_factory):
+    _type, _instance = _client_factory("InvisibleClient", 1)
+
+    @inject(_type)
+    def wrapped(**kwargs):
+        return kwargs
+
+    seen = []
+    with client_ctx(_type, _instance):
+        thread = threading.Thread(target=lambda: seen.append(wrapped()))
+        thread.start()
+        thread.join()
+        assert wrapped() == {"client": _instance}
+    assert seen == [{}]
+    assert wrapped() == {}
+
+
+def test_scopes_are_thread_safe(_client_factory):
+    _type, _ = _client_factory("StressedClient", 0)
+
+    @inject(_type)
+    def wrapped(client):
+        return client
+
+    errors = []
+    barrier = threading.Barrier(16)
+
+    def worker(idx):
+        barrier.wait()
+        for _ in range(200):
+            with client_ctx(_type, _type(idx)) as _instance:
+                if wrapped() is not _instance:
+                    errors.append(idx)
+
+    threads = [threading.Thread(target=worker, args=(_,)) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_scopes_are_task_safe(_client_factory):
+    _type, _ = _client_factory("AsyncClient", 0)
+
+    @inject(_type)
+    def wrapped(client):
+        return client
+
+    async def task(idx):
+        for _ in range(50):
+            with client_ctx(_type, _type(idx)) as _instance:
+                await asyncio.sleep(0)
+                assert wrapped() is _instance
+
+    async def main():
+        await asyncio.gather(*(task(_) for _ in range(32)))
+
+    asyncio.run(main())
+
+
+def test_alternating_scopes_keep_resolved_clients(_client_factory, monkeypatch):
+    _type, _ = _client_factory("AlternatingClient", 0)
+    lookups = []
+    _lookup = registry._lookup
+
+    def _counting_lookup(key, current):
+        lookups.append(key)
+        return _lookup(key, current)
+
+    monkeypatch.setattr(registry, "_lookup", _counting_lookup)
+
+    @inject(_type)
+    def wrapped(client):
+        return client
+
+    async def task(idx):
+        with client_ctx(_type, _type(idx)) as _instance:
+            # let both tasks register before alternating between them
+            await asyncio.sleep(0)
+            for _ in range(10):
+                assert wrapped() is _instance
+                await asyncio.sleep(0)
+
+    async def main():
+        await asyncio.gather(task(0), task(1))
+
+    asyncio.run(main())
+    assert len(lookups) == 2
+
+
+@pytest.fixture
+def _counting_factory(_client_factory):
+    _type, _ = _client_factory("FactoryClient", 0)
+    built = []
+    closed = []
+
+    def _build():
+        built.append(_type(len(built)))
+        return built[-1]
+
+    return _type, _build, built, closed
+
+
+def test_factory_builds_lazily(_counting_factory):
+    _type, _build, built, closed = _counting_factory
+    register_factory(_type, _build, on_close=closed.append)
+
+    @inject(_type)
+    def wrapped(client):
+        return client
+
+    assert built == []
+    assert wrapped() is wrapped() is built[0]
+    assert wrapped(client="mock") == "mock"
+    assert len(built) == 1
+    deregister(_type)
+    assert closed == built
+
+
+def test_factory_unknown_scope(_counting_factory):
+    _type, _build, *_ = _counting_factory
+    with pytest.raises(ValueError):
+        register_factory(_type, _build, scope="request")
+
+
+def test_factory_singleton_is_shared_by_threads(_counting_factory):
+    _type, _build, built, _ = _counting_factory
+    register_factory(_type, _build, scope=SINGLETON)
+
+    @inject(_type)
+    def wrapped(client):
+        return client
+
+    seen = []
+    threads = [
+        threading.Thread(target=lambda: seen.append(wrapped()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1
+    assert all(_ is built[0] for _ in seen)
+    deregister(_type)
+
+
+def test_factory_per_thread(_counting_factory):
+    _type, _build, built, closed = _counting_factory
+    register_factory(_type, _build, scope=PER_THREAD, on_close=closed.append)
+
+    @inject(_type)
+    def wrapped(client):
+        return client
+
+    seen = []
+
+    def worker():
+        seen.append((wrapped(), wrapped()))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 4
+    assert all(first is second for first, second in seen)
+    deregister(_type)
+    assert closed == built
+
+
+def test_factory_pool_is_bounded(_counting_factory):
+    _type, _build, built, closed = _counting_factory
+    register_factory(
+        _type, _build, scope=POOLED, size=2, on_close=closed.append
+    )
+    in_use = set()
+    overlaps = []
+    lock = threading.Lock()
+
+    @inject(_type)
+    def wrapped(client):
+        with lock:
+            overlaps.append(id(client) in in_use)
+            in_use.add(id(client))
+        time.sleep(0.001)
+        with lock:
+            in_use.discard(id(client))
+
+    threads = [
+        threading.Thread(target=lambda: [wrapped() for _ in range(20)])
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 2
+    assert not any(overlaps)
+    deregister(_type)
+    assert sorted(closed, key=id) == sorted(built, key=id)
+
+
+def test_factory_pool_releases_on_error(_counting_factory):
+    _type, _build, built, _ = _counting_factory
+    register_factory(_type, _build, scope=POOLED, size=1)
+
+    @inject(_type)
+    def wrapped(client, fail):
+        if fail:
+            raise RuntimeError
+        return client
+
+    with pytest.raises(RuntimeError):
+        wrapped(fail=True)
+    assert wrapped(fail=False) is built[0]
+    deregister(_type)
+
+
+def test_factory_pool_holds_instances_for_coroutines(_counting_factory):
+    _type, _build, built, _ = _counting_factory
+    register_factory(_type, _build, scope=POOLED, size=1)
+    in_use = []
+    overlaps = []
+
+    @inject(_type)
+    async def wrapped(client):
+        overlaps.append(bool(in_use))
+        in_use.append(client)
+        await asyncio.sleep(0.001)
+        in_use.remove(client)
+
+    async def main():
+        await asyncio.gather(*(wrapped() for _ in range(4)))
+
+    asyncio.run(main())
+    assert len(built) == 1
+    assert overlaps == [False] * 4
+    deregister(_type)
+
+
+def test_factory_pool_holds_instances_for_generators(_counting_factory):
+    _type, _build, built, _ = _counting_factory
+    register_factory(_type, _build, scope=POOLED, size=2)
+
+    @inject(_type)
+    def clients(client):
+        yield client
+        yield client
+
+    @inject(_type)
+    def wrapped(client):
+        return client
+
+    def from_thread():
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(wrapped()))
+        thread.start()
+        thread.join()
+        return seen[0]
+
+    held = clients()
+    first = next(held)
+    assert from_thread() is not first
+    assert list(held) == [first]
+    assert from_thread() is first
+    deregister(_type)
+
+
+def test_factory_pool_is_reentrant(_counting_factory):
+    _type, _build, built, _ = _counting_factory
+    register_factory(_type, _build, scope=POOLED, size=1)
+
+    @inject(_type)
+    def inner(client):
+        return client
+
+    @inject(_type)
+    def outer(client):
+        return client, inner()
+
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(outer()))
+    thread.start()
+    thread.join(timeout=1)
+    assert not thread.is_alive()
+    assert seen == [(built[0], built[0])]
+    assert inner() is built[0]
+    deregister(_type)
+
+
+def test_factory_pool_rejects_async_generators(_counting_factory):
+    _type, _build, *_ = _counting_factory
+    register_factory(_type, _build, scope=POOLED)
+
+    @inject(_type)
+    async def wrapped(client):
+        yield client
+
+    with pytest.raises(TypeError):
+        wrapped()
+    deregister(_type)
+
+
+def test_factory_closed_when_registered_again(_counting_factory):
+    _type, _build, built, closed = _counting_factory
+    register_factory(_type, _build, scope=POOLED, on_close=closed.append)
+
+    @inject(_type)
+    def wrapped(client):
+        return client
+
+    first = wrapped()
+    with scope():
+        register_factory(_type, _build, scope=POOLED)
+        assert closed == []
+    register_factory(_type, _build, scope=POOLED)
+    assert closed == [first]
+    assert wrapped() is not first
+    deregister(_type)
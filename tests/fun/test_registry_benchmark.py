@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from der_py.fun.registry import deregister, inject, register
+
+N_CALLS = 1_000_000
+
+
+class _BenchClient:
+    pass
+
+
+class _OtherBenchClient:
+    pass
+
+
+def _plain(x, client=None):
+    return x
+
+
+@inject(_BenchClient)
+def _single(x, client=None):
+    return x
+
+
+@inject(_BenchClient, _OtherBenchClient)
+def _multiple(x, **kwargs):
+    return x
+
+
+def _time(fn, *args):
+    started = time.perf_counter()
+    for _ in range(N_CALLS):
+        fn(*args)
+    return time.perf_counter() - started
+
+
+@pytest.mark.benchmark
+def test_inject_call_overhead():
+    register(_BenchClient, _BenchClient())
+    register(_OtherBenchClient, _OtherBenchClient())
+    try:
+        client = _BenchClient()
+        plain = _time(_plain, 1, client)
+        single = _time(_single, 1)
+        multiple = _time(_multiple, 1)
+    finally:
+        deregister(_BenchClient)
+        deregister(_OtherBenchClient)
+
+    print(
+        f"\n{N_CALLS} calls: undecorated {plain:0.3f}s, "
+        f"one client {single:0.3f}s "
+        f"(+{(single - plain) / N_CALLS * 1e9:0.0f}ns/call), "
+        f"two clients {multiple:0.3f}s "
+        f"(+{(multiple - plain) / N_CALLS * 1e9:0.0f}ns/call)"
+    )
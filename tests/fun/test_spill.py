@@ -0,0 +1,65 @@
+from tempfile import TemporaryFile
+
+import pytest
+
+from der_py.fun import key_by as eager_key_by
+from der_py.fun import spill
+from der_py.fun import split_by as eager_split_by
+from der_py.fun.spill import key_by, split_by
+
+
+@pytest.mark.parametrize("max_items", [1, 7, 100, 10_000])
+def test_key_by_matches_eager(max_items, tmp_path):
+    xs = [(_ * 7919) % 1000 for _ in range(1000)]
+
+    groups = key_by(
+        lambda _: _ % 13, xs, max_items=max_items, spill_dir=tmp_path
+    )
+
+    assert dict(groups) == eager_key_by(lambda _: _ % 13, xs)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_key_by_is_lazy():
+    pulled = []
+
+    def source():
+        for idx in range(10):
+            pulled.append(idx)
+            yield idx
+
+    groups = key_by(lambda _: _ % 2, source(), max_items=3)
+    assert pulled == []
+    assert next(groups)
+    assert len(pulled) == 10
+    groups.close()
+
+
+def test_key_by_spills(monkeypatch):
+    opened = []
+
+    def _temporary_file(**kwargs):
+        opened.append(TemporaryFile(**kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(spill, "TemporaryFile", _temporary_file)
+
+    groups = dict(key_by(lambda _: _ % 3, range(100), max_items=10))
+
+    assert groups == eager_key_by(lambda _: _ % 3, range(100))
+    assert len(opened) == spill.PARTITIONS
+    assert all(_.closed for _ in opened)
+
+
+def test_key_by_does_not_spill_small_inputs(monkeypatch):
+    monkeypatch.setattr(spill, "TemporaryFile", None)
+    assert dict(key_by(len, ["a", "bb", "c"])) == {1: ["a", "c"], 2: ["bb"]}
+
+
+@pytest.mark.parametrize("max_items", [1, 2, 5, 100])
+def test_split_by_matches_eager(max_items):
+    xs = list(range(50))
+
+    left, right = split_by(lambda _: _ % 3 == 0, xs, max_items=max_items)
+
+    assert (list(left), list(right)) == eager_split_by(lambda _: _ % 3 == 0, xs)
@@ -0,0 +1,122 @@
+import threading
+import time
+from itertools import count
+
+import pytest
+
+from der_py.fun.stream import Stream
+
+
+def test_stream_is_lazy():
+    pulled = []
+
+    def source():
+        for idx in count():
+            pulled.append(idx)
+            yield idx
+
+    stream = Stream(source()).map(lambda _: _ + 1).filter(lambda _: _ % 2)
+    assert pulled == []
+    assert next(iter(stream)) == 1
+    assert pulled == [0]
+
+
+def test_stream_stages():
+    stream = (
+        Stream(["ab", "cd", "ef"])
+        .flatmap(list)
+        .pipe(str.upper, lambda _: _ * 2)
+        .pairwise()
+    )
+    assert stream.to_list() == [
+        ("AA", "BB"),
+        ("BB", "CC"),
+        ("CC", "DD"),
+        ("DD", "EE"),
+        ("EE", "FF"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "xs, n, expected",
+    [
+        ([], 2, []),
+        ([1, 2, 3], 1, [[1], [2], [3]]),
+        ([1, 2, 3, 4, 5], 2, [[1, 2], [3, 4], [5]]),
+        ([1, 2], 5, [[1, 2]]),
+    ],
+)
+def test_chunked(xs, n, expected):
+    assert Stream(xs).chunked(n).to_list() == expected
+
+
+def test_chunked_invalid():
+    with pytest.raises(ValueError):
+        Stream([]).chunked(0)
+
+
+def test_terminal_operations():
+    assert Stream(range(5)).key_by(lambda _: _ % 2) == {
+        0: [0, 2, 4],
+        1: [1, 3],
+    }
+    assert Stream(range(5)).split_by(lambda _: _ > 2) == ([0, 1, 2], [3, 4])
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_par_map_ordered(executor):
+    stream = Stream(range(-50, 50)).par_map(abs, workers=3, executor=executor)
+    assert stream.to_list() == [abs(_) for _ in range(-50, 50)]
+
+
+def test_par_map_unordered():
+    def slow_first(x):
+        if x == 0:
+            time.sleep(0.05)
+        return x
+
+    results = Stream(range(10)).par_map(slow_first, ordered=False).to_list()
+    assert sorted(results) == list(range(10))
+    assert results[-1] == 0
+
+
+def test_par_map_runs_in_parallel():
+    barrier = threading.Barrier(4, timeout=5)
+
+    def meet(x):
+        barrier.wait()
+        return x
+
+    assert Stream(range(8)).par_map(meet, workers=4).to_list() == list(range(8))
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_par_map_bounded_buffer(ordered):
+    pulled = []
+
+    def source():
+        for idx in count():
+            pulled.append(idx)
+            yield idx
+
+    stream = iter(
+        Stream(source()).par_map(
+            lambda _: _, workers=2, buffer=4, ordered=ordered
+        )
+    )
+    next(stream)
+    time.sleep(0.01)
+    assert len(pulled) <= 4 + 2
+    stream.close()
+
+
+def test_par_map_propagates_errors():
+    with pytest.raises(ZeroDivisionError):
+        Stream([1, 0]).par_map(lambda _: 1 / _).to_list()
+
+
+def test_par_map_invalid():
+    with pytest.raises(ValueError):
+        Stream([]).par_map(abs, executor="fiber")
+    with pytest.raises(ValueError):
+        Stream([]).par_map(abs, workers=4, buffer=2)
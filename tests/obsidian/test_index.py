@@ -0,0 +1,95 @@
+import os
+import sqlite3
+from contextlib import closing
+from unittest.mock import MagicMock
+
+import pytest
+
+from der_py.obsidian import index
+from der_py.obsidian.index import INDEX_NAME, indexed_aliases
+from der_py.obsidian.use_alias import _all_aliases, vault_replace_map
+
+
+@pytest.fixture
+def vault(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "foo.md").write_text("---\naliases: [Foo]\n---\nbody\n")
+    (tmp_path / "bar.md").write_text("---\nalias: Bar\n---\n")
+    (tmp_path / "plain.md").write_text("no frontmatter\n")
+    return tmp_path
+
+
+def _aliaser():
+    return MagicMock(side_effect=_all_aliases)
+
+
+def _by_name(vault, entries):
+    return {note.rel_name(vault): aliases for note, aliases in entries}
+
+
+def test_index_first_run_parses_everything(vault):
+    aliaser = _aliaser()
+    res = _by_name(vault, indexed_aliases(vault, aliaser))
+
+    assert res == {"sub/foo": ["Foo"], "bar": ["Bar"], "plain": []}
+    assert aliaser.call_count == 3
+    assert (vault / INDEX_NAME).exists()
+
+
+def test_index_only_reparses_changed_notes(vault):
+    indexed_aliases(vault, _aliaser())
+
+    foo = vault / "sub" / "foo.md"
+    foo.write_text("---\naliases: [Foo, Fooz]\n---\nbody changed\n")
+    stat = foo.stat()
+    os.utime(foo, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    aliaser = _aliaser()
+    res = _by_name(vault, indexed_aliases(vault, aliaser))
+
+    assert aliaser.call_count == 1
+    assert res["sub/foo"] == ["Foo", "Fooz"]
+    assert res["bar"] == ["Bar"]
+
+
+def test_index_prunes_deleted_notes(vault):
+    indexed_aliases(vault, _aliaser())
+    (vault / "bar.md").unlink()
+
+    aliaser = _aliaser()
+    res = _by_name(vault, indexed_aliases(vault, aliaser))
+
+    assert "bar" not in res
+    assert aliaser.call_count == 0
+
+
+def test_index_recovers_from_corrupt_file(vault):
+    (vault / INDEX_NAME).write_bytes(b"definitely not sqlite" * 100)
+    res = _by_name(vault, indexed_aliases(vault, _aliaser()))
+    assert res["bar"] == ["Bar"]
+
+
+def test_index_falls_back_to_full_scan_when_locked(vault, monkeypatch):
+    indexed_aliases(vault, _aliaser())
+    inode = (vault / INDEX_NAME).stat().st_ino
+    monkeypatch.setattr(index, "LOCK_TIMEOUT", 0.01)
+
+    with closing(sqlite3.connect((vault / INDEX_NAME).as_posix())) as conn:
+        conn.execute("BEGIN EXCLUSIVE")
+        aliaser = _aliaser()
+        res = _by_name(vault, indexed_aliases(vault, aliaser))
+        conn.rollback()
+
+    assert res == {"sub/foo": ["Foo"], "bar": ["Bar"], "plain": []}
+    assert aliaser.call_count == 3
+    assert (vault / INDEX_NAME).stat().st_ino == inode
+
+    aliaser = _aliaser()
+    indexed_aliases(vault, aliaser)
+    assert aliaser.call_count == 0
+
+
+def test_vault_replace_map_same_with_and_without_index(vault):
+    assert vault_replace_map(vault) == vault_replace_map(
+        vault, index_path=vault / INDEX_NAME
+    )
@@ -0,0 +1,50 @@
+import pytest
+
+from der_py.obsidian import Note
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("", {}),
+        ("no frontmatter\n", {}),
+        ("---\n---\n", {}),
+        ("---\naliases: [foo]\n---\nbody\n", {"aliases": ["foo"]}),
+        ("---\r\nalias: foo\r\n---\r\n", {"alias": "foo"}),
+        ("---\nalias: foo\n---", {"alias": "foo"}),
+        ("---\nalias: foo\n", {}),
+        ("---\nalias: [unclosed\n---\n", {}),
+        ("---\n- a list\n---\n", {}),
+        ("----\nalias: foo\n----\n", {}),
+    ],
+    ids=[
+        "empty",
+        "no-frontmatter",
+        "empty-frontmatter",
+        "aliases",
+        "crlf",
+        "closed-at-eof",
+        "never-closed",
+        "bad-yaml",
+        "not-a-mapping",
+        "not-a-delimiter",
+    ],
+)
+def test_frontmatter(tmp_path, text, expected):
+    path = tmp_path / "note.md"
+    path.write_bytes(text.encode())
+    assert Note(path).frontmatter == expected
+
+
+def test_frontmatter_stops_at_max_size(tmp_path):
+    path = tmp_path / "note.md"
+    path.write_text("---\nalias: foo\nlog: " + "x" * 100 + "\n---\n")
+
+    assert Note(path).frontmatter["alias"] == "foo"
+    assert Note(path, max_frontmatter_size=50).frontmatter == {}
+
+
+def test_frontmatter_ignores_the_body(tmp_path):
+    path = tmp_path / "note.md"
+    path.write_bytes(b"---\nalias: foo\n---\n" + b"\xff" * 1024)
+    assert Note(path).frontmatter == {"alias": "foo"}
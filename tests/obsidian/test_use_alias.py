@@ -1,8 +1,16 @@
+import re
 from unittest.mock import MagicMock
 
 import pytest
 
-from der_py.obsidian.use_alias import _all_aliases
+from der_py.obsidian import Line
+from der_py.obsidian.use_alias import (
+    _all_aliases,
+    _link_map,
+    _replace_map,
+    process_line,
+    rewrite_line,
+)
 
 
 @pytest.mark.parametrize(
@@ -34,3 +42,32 @@ def test_all_aliases(frontmatter, expected):
     note.frontmatter = frontmatter
 
     assert _all_aliases(note) == expected
+
+
+_ALIAS_MAP = {"Foo": "notes/foo", "Bar": "bar", "baz": "baz"}
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("", ""),
+        ("no links here", "no links here"),
+        ("see [[notes/foo]]", "see [[notes/foo|Foo]]"),
+        (
+            "[[bar]] and [[notes/foo]] but not [[baz]]",
+            "[[bar|Bar]] and [[notes/foo|Foo]] but not [[baz]]",
+        ),
+        (
+            "already [[bar|Bar]], unknown [[qux]]",
+            "already [[bar|Bar]], unknown [[qux]]",
+        ),
+        ("nested [[[[bar]]]]", "nested [[[[bar|Bar]]]]"),
+    ],
+)
+def test_rewrite_line_matches_regex_engine(text, expected):
+    line = Line(text, 0)
+    replace_map = _replace_map(_ALIAS_MAP)
+    pattern = re.compile("|".join(replace_map.keys()))
+
+    assert list(rewrite_line(line, _link_map(_ALIAS_MAP))) == [expected]
+    assert list(process_line(line, pattern, replace_map)) == [expected]
@@ -48,7 +48,7 @@ def test_goodreads_invoke(
     mock_get_book_ratings.side_effect = iter(mock_ratings["api_ratings"])
 
     with (
-        patch(f"{module}.Pool", mock_pool),
+        patch("multiprocessing.Pool", mock_pool),
         patch(f"{module}.get_book_ratings", mock_get_book_ratings),
     ):
         result = runner.invoke(goodreads.main, mock_csv_export)
@@ -61,3 +61,239 @@ def test_goodreads_invoke(
         assert deviant_ratings == mock_ratings["deviant_ratings"]
 
         assert result.exit_code == 0
+
+
+def test_goodreads_invoke_with_session_fetcher(
+    runner: CliRunner,
+    mock_csv_export,
+    mock_ratings: MockRatings,
+):
+    fetcher = MagicMock()
+    fetcher.return_value.__enter__.return_value.map_unordered = lambda ids: (
+        (_, mock_ratings["api_ratings"][int(_) - 1]) for _ in ids
+    )
+
+    with patch("der_py.scripts.goodreads.SessionRatingFetcher", fetcher):
+        result = runner.invoke(
+            goodreads.main, [mock_csv_export, "--concurrency", "4"]
+        )
+
+    assert result.exit_code == 0
+    fetcher.assert_called_once_with(concurrency=4, rate=5.0)
+    res: List[goodreads._Record] = json.loads(result.stdout)
+    assert {float(_["average_rating"]) for _ in res} == mock_ratings[
+        "average_ratings"
+    ]
+
+
+def test_goodreads_caches_ratings(
+    runner: CliRunner,
+    mock_csv_export,
+    mock_pool,
+    mock_ratings: MockRatings,
+):
+    module = "der_py.scripts.goodreads"
+    mock_get_book_ratings = MagicMock()
+    mock_get_book_ratings.side_effect = lambda book_id: mock_ratings[
+        "api_ratings"
+    ][int(book_id) - 1]
+
+    with (
+        patch("multiprocessing.Pool", mock_pool),
+        patch(f"{module}.get_book_ratings", mock_get_book_ratings),
+    ):
+        first = runner.invoke(goodreads.main, mock_csv_export)
+        assert mock_get_book_ratings.call_count == 4
+        assert "cache: 0 hit(s), 4 miss(es)" in first.stderr
+
+        # the all-zeroes rating of an unrated book is cached too
+        second = runner.invoke(goodreads.main, mock_csv_export)
+        assert mock_get_book_ratings.call_count == 4
+        assert "cache: 4 hit(s), 0 miss(es)" in second.stderr
+        assert json.loads(second.stdout) == json.loads(first.stdout)
+
+        runner.invoke(goodreads.main, [mock_csv_export, "--refresh-cache"])
+        assert mock_get_book_ratings.call_count == 8
+
+        runner.invoke(goodreads.main, [mock_csv_export, "--no-cache"])
+        assert mock_get_book_ratings.call_count == 12
+
+
+def test_goodreads_does_not_cache_failed_fetches(
+    runner: CliRunner, mock_csv_export, mock_pool
+):
+    module = "der_py.scripts.goodreads"
+    mock_get_book_ratings = MagicMock(return_value=[])
+
+    with (
+        patch("multiprocessing.Pool", mock_pool),
+        patch(f"{module}.get_book_ratings", mock_get_book_ratings),
+    ):
+        runner.invoke(goodreads.main, mock_csv_export)
+        second = runner.invoke(goodreads.main, mock_csv_export)
+
+    assert mock_get_book_ratings.call_count == 8
+    assert "cache: 0 hit(s), 4 miss(es)" in second.stderr
+
+
+@pytest.mark.parametrize("top", [None, 2])
+def test_goodreads_jsonl(
+    runner: CliRunner,
+    mock_csv_export,
+    mock_pool,
+    mock_ratings: MockRatings,
+    top,
+):
+    module = "der_py.scripts.goodreads"
+    mock_get_book_ratings = MagicMock()
+    mock_get_book_ratings.side_effect = iter(mock_ratings["api_ratings"])
+    top_args = ["--top", str(top)] if top else []
+
+    with (
+        patch("multiprocessing.Pool", mock_pool),
+        patch(f"{module}.get_book_ratings", mock_get_book_ratings),
+    ):
+        result = runner.invoke(
+            goodreads.main, [mock_csv_export, "--format", "jsonl", *top_args]
+        )
+
+    assert result.exit_code == 0
+    res = [json.loads(_) for _ in result.stdout.splitlines()]
+    deviant_ratings = [float(_["deviant_rating"]) for _ in res]
+    if top:
+        assert deviant_ratings == [4.4, 2.0]
+    else:
+        assert sorted(deviant_ratings) == [0.0, 0.0, 2.0, 4.4]
+
+
+@pytest.mark.parametrize(
+    "ratings",
+    [
+        [[1, 1, 1, 1, 1], [7, 3, 0, 2, 4], [4, 0, 0, 0, 1], [0, 0, 0, 0, 0]],
+        [[], [1], [0, 0, 0, 5]],
+        [],
+    ],
+)
+def test_rating_batch_matches_per_object(ratings):
+    pytest.importorskip("numpy")
+    batch = goodreads._RatingBatch(ratings)
+    per_object = [goodreads._Rating(*_) for _ in ratings]
+
+    assert len(batch) == len(ratings)
+    assert batch.deviant.tolist() == [_.deviant for _ in per_object]
+    assert batch.average.tolist() == [_.average for _ in per_object]
+    assert batch.ranking().tolist() == sorted(
+        range(len(ratings)), key=lambda _: per_object[_].deviant, reverse=True
+    )
+
+
+def test_rating_batch_percentiles():
+    pytest.importorskip("numpy")
+    batch = goodreads._RatingBatch([[0, 0, 1, 0, 0], [2, 0, 1, 0, 0]])
+    percentiles = batch.percentiles([0, 50, 100])
+    assert percentiles["deviant"] == [0.0, 1.0, 2.0]
+    assert percentiles["average"] == pytest.approx([3.0, 11 / 3, 13 / 3])
+
+
+@pytest.mark.parametrize(
+    "has_numpy, top", [(True, None), (False, None), (True, 3)]
+)
+def test_goodreads_breaks_ties_in_csv_order(
+    runner: CliRunner, tmp_path, has_numpy, top
+):
+    if has_numpy:
+        pytest.importorskip("numpy")
+    csv_path = tmp_path / "export.csv"
+    rows = [f"{_},book {_},to-read\n" for _ in (3, 1, 2, 1)]
+    csv_path.write_text("".join(["Book Id,Title,Bookshelves\n", *rows]))
+    fetcher = MagicMock()
+    # completion order differs from the CSV order, ratings are all tied
+    fetcher.return_value.__enter__.return_value.map_unordered = lambda ids: (
+        (_, [1, 1, 1, 1, 1]) for _ in reversed(list(ids))
+    )
+    top_args = ["--top", str(top)] if top else []
+
+    with (
+        patch("der_py.scripts.goodreads.SessionRatingFetcher", fetcher),
+        patch("der_py.scripts.goodreads._has_numpy", lambda: has_numpy),
+    ):
+        result = runner.invoke(
+            goodreads.main,
+            [csv_path.as_posix(), "-c", "2", "--no-cache", *top_args],
+        )
+
+    assert result.exit_code == 0, result.stderr
+    book_ids = [_["book_id"] for _ in json.loads(result.stdout)]
+    assert book_ids == ["3", "1", "2", "1"][:top]
+
+
+def test_goodreads_caches_ratings_of_interrupted_runs(tmp_path):
+    csv_path = tmp_path / "export.csv"
+    rows = [f"{_},book {_},to-read\n" for _ in (1, 2, 3)]
+    csv_path.write_text("".join(["Book Id,Title,Bookshelves\n", *rows]))
+
+    def map_unordered(ids):
+        yield "1", [1, 0, 0, 0, 0]
+        yield "2", [2, 0, 0, 0, 0]
+        raise KeyboardInterrupt
+
+    fetcher = MagicMock()
+    fetcher.map_unordered = map_unordered
+    with goodreads.RatingCache(tmp_path / "cache.sqlite3") as cache:
+        with pytest.raises(KeyboardInterrupt):
+            list(goodreads._iter_rated_books(csv_path, fetcher, cache))
+        assert set(cache.get_many([1, 2, 3])) == {"1", "2"}
+
+
+def _invoke_with_ratings(runner, csv_export, mock_pool, ratings, *args):
+    module = "der_py.scripts.goodreads"
+    mock_get_book_ratings = MagicMock(side_effect=iter(ratings))
+    with (
+        patch("multiprocessing.Pool", mock_pool),
+        patch(f"{module}.get_book_ratings", mock_get_book_ratings),
+    ):
+        return runner.invoke(goodreads.main, [csv_export, "--no-cache", *args])
+
+
+def test_goodreads_batch_records_match_per_object(
+    runner: CliRunner, mock_csv_export, mock_pool, mock_ratings: MockRatings
+):
+    pytest.importorskip("numpy")
+    ratings = mock_ratings["api_ratings"]
+    batch = _invoke_with_ratings(runner, mock_csv_export, mock_pool, ratings)
+    with patch("der_py.scripts.goodreads._has_numpy", lambda: False):
+        per_object = _invoke_with_ratings(
+            runner, mock_csv_export, mock_pool, ratings
+        )
+
+    assert batch.exit_code == per_object.exit_code == 0
+    assert json.loads(batch.stdout) == json.loads(per_object.stdout)
+
+
+def test_goodreads_percentiles(
+    runner: CliRunner, mock_csv_export, mock_pool, mock_ratings: MockRatings
+):
+    pytest.importorskip("numpy")
+    result = _invoke_with_ratings(
+        runner,
+        mock_csv_export,
+        mock_pool,
+        mock_ratings["api_ratings"],
+        "--percentiles",
+    )
+
+    assert result.exit_code == 0, result.stderr
+    stats = json.loads(result.stdout)
+    assert stats["percentiles"] == list(goodreads.PERCENTILES)
+    assert stats["deviant"][0] == 0.0 and stats["deviant"][-1] == 4.4
+    assert stats["average"][0] == 0.0 and stats["average"][-1] == 4.2
+
+
+def test_goodreads_percentiles_need_numpy(runner: CliRunner, mock_csv_export):
+    with patch("der_py.scripts.goodreads._has_numpy", lambda: False):
+        result = runner.invoke(
+            goodreads.main, [mock_csv_export, "--percentiles"]
+        )
+
+    assert result.exit_code == 2
+    assert "--percentiles needs numpy" in result.stderr
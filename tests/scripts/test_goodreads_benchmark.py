@@ -0,0 +1,39 @@
+import random
+import time
+
+import pytest
+
+from der_py.scripts import goodreads
+
+N_BOOKS = 100_000
+
+
+@pytest.mark.benchmark
+def test_rating_batch_vs_per_object():
+    pytest.importorskip("numpy")
+    rnd = random.Random(42)
+    ratings = [
+        [rnd.choice([0, rnd.randint(0, 10_000)]) for _ in range(5)]
+        for _ in range(N_BOOKS)
+    ]
+
+    started = time.perf_counter()
+    per_object = [goodreads._Rating(*_) for _ in ratings]
+    deviant = [_.deviant for _ in per_object]
+    average = [_.average for _ in per_object]
+    order = sorted(range(N_BOOKS), key=deviant.__getitem__, reverse=True)
+    per_object_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = goodreads._RatingBatch(ratings)
+    batch_order = batch.ranking()
+    batch.average
+    batch_time = time.perf_counter() - started
+
+    assert batch.deviant.tolist() == deviant
+    assert batch.average.tolist() == average
+    assert batch_order.tolist() == order
+    print(
+        f"\n{N_BOOKS} books: per-object {per_object_time:0.3f}s, "
+        f"batch {batch_time:0.3f}s ({per_object_time / batch_time:0.1f}x)"
+    )
@@ -0,0 +1,128 @@
+import os
+
+import pytest
+
+from der_py.scripts import obsidian_toolkit
+
+
+@pytest.fixture
+def vault(tmp_path):
+    (tmp_path / "foo.md").write_text("---\naliases: [Foo]\n---\n")
+    for idx in range(6):
+        (tmp_path / f"note{idx}.md").write_text(f"link to [[foo]] #{idx}\n")
+    return tmp_path
+
+
+@pytest.mark.parametrize("jobs", ["1", "3"])
+def test_use_alias(runner, vault, jobs):
+    notes = sorted(vault.glob("note*.md"))
+    in_files = [arg for _ in notes for arg in ("-i", _.as_posix())]
+    result = runner.invoke(
+        obsidian_toolkit.main,
+        ["use-alias", "-V", vault.as_posix(), *in_files, "--jobs", jobs],
+    )
+
+    assert result.exit_code == 0, result.stderr
+    for idx, note in enumerate(notes):
+        assert note.read_text() == f"link to [[foo|Foo]] #{idx}\n"
+
+
+def test_auto_alias_reports_timings(runner, vault):
+    notes = sorted(vault.glob("*.md"))
+    in_files = [arg for _ in notes for arg in ("-i", _.as_posix())]
+    result = runner.invoke(
+        obsidian_toolkit.main,
+        ["auto-alias", *in_files, "-j", "2", "--timings"],
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert (vault / "foo.md").read_text() == "---\naliases: [Foo]\n---\n"
+    assert (
+        (vault / "note0.md")
+        .read_text()
+        .startswith('---\naliases: ["note0"]\n---\n')
+    )
+    assert f"processed {len(notes)} file(s) with 2 job(s)" in result.stderr
+    assert result.stderr.count("ms\n") == len(notes)
+
+
+def test_use_alias_dry_run(runner, vault):
+    note = vault / "note0.md"
+    result = runner.invoke(
+        obsidian_toolkit.main,
+        [
+            *("use-alias", "-V", vault.as_posix(), "-i", note.as_posix()),
+            *("-i", (vault / "foo.md").as_posix(), "--dry-run"),
+        ],
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout == "1 file(s) and 1 link(s) would change\n"
+    assert note.read_text() == "link to [[foo]] #0\n"
+
+
+def test_use_alias_skips_unchanged_files(runner, vault):
+    note = vault / "note0.md"
+    note.write_text("no links\n")
+    mtime_ns = note.stat().st_mtime_ns - 10 ** 9
+    os.utime(note, ns=(mtime_ns, mtime_ns))
+
+    result = runner.invoke(
+        obsidian_toolkit.main,
+        ["use-alias", "-V", vault.as_posix(), "-i", note.as_posix(), "--stats"],
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout == "0 file(s) and 0 link(s) changed\n"
+    assert note.stat().st_mtime_ns == mtime_ns
+
+
+def test_use_alias_writes_atomically(runner, vault):
+    note = vault / "note0.md"
+    note.chmod(0o640)
+    result = runner.invoke(
+        obsidian_toolkit.main,
+        ["use-alias", "-V", vault.as_posix(), "-i", note.as_posix()],
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert note.read_text() == "link to [[foo|Foo]] #0\n"
+    assert note.stat().st_mode & 0o777 == 0o640
+    assert not list(vault.glob(".note0.md.*"))
+
+
+@pytest.mark.parametrize("text", ["", "no links", "link to [[bar]]"])
+def test_use_alias_keeps_files_without_trailing_newline(runner, vault, text):
+    note = vault / "note0.md"
+    note.write_text(text)
+    mtime_ns = note.stat().st_mtime_ns - 10 ** 9
+    os.utime(note, ns=(mtime_ns, mtime_ns))
+
+    result = runner.invoke(
+        obsidian_toolkit.main,
+        ["use-alias", "-V", vault.as_posix(), "-i", note.as_posix(), "--stats"],
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout == "0 file(s) and 0 link(s) changed\n"
+    assert note.stat().st_mtime_ns == mtime_ns
+
+
+def test_use_alias_keeps_missing_trailing_newline(runner, vault):
+    note = vault / "note0.md"
+    note.write_text("link to [[foo]]")
+    result = runner.invoke(
+        obsidian_toolkit.main,
+        ["use-alias", "-V", vault.as_posix(), "-i", note.as_posix()],
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert note.read_text() == "link to [[foo|Foo]]"
+
+
+def test_atomic_write_cleans_up_on_failed_write(tmp_path):
+    target = tmp_path / "note.md"
+    with pytest.raises(UnicodeEncodeError):
+        obsidian_toolkit._atomic_write(target, "\ud800")
+
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,91 @@
+"""Startup cost of the console scripts.
+
+Heavy dependencies must only be imported on the code paths that need them,
+so `--help` and `--version` stay snappy.
+"""
+import subprocess  # noqa: S404
+import sys
+from typing import Dict
+
+import pytest
+
+HEAVY_MODULES = (
+    "requests",
+    "desert",
+    "marshmallow",
+    "yaml",
+    "numpy",
+    "multiprocessing",
+    "sqlite3",
+    "concurrent.futures",
+)
+
+# console script -> module
+ENTRY_POINTS: Dict[str, str] = {
+    "derpy": "der_py.__main__",
+    "goodreads": "der_py.scripts.goodreads",
+    "otk": "der_py.scripts.obsidian_toolkit",
+}
+# console script -> cumulative import time budget, in ms
+IMPORT_BUDGET_MS: Dict[str, float] = {
+    "derpy": 40.0,
+    "goodreads": 40.0,
+    "otk": 40.0,
+}
+
+_HELP_SCRIPT = """
+import sys
+from {module} import main
+try:
+    main([{arg!r}])
+except SystemExit:
+    pass
+print(",".join(_ for _ in {heavy!r} if _ in sys.modules), file=sys.stderr)
+"""
+
+
+def _run(*args: str) -> subprocess.CompletedProcess:
+    # only ever runs the current interpreter, on our own snippets
+    return subprocess.run(  # noqa: S603
+        [sys.executable, *args], capture_output=True, text=True, check=True
+    )
+
+
+@pytest.mark.parametrize(
+    "command, arg",
+    [
+        ("derpy", "--help"),
+        ("derpy", "--version"),
+        ("goodreads", "--help"),
+        ("otk", "--help"),
+    ],
+)
+def test_help_does_not_import_heavy_modules(command, arg):
+    script = _HELP_SCRIPT.format(
+        module=ENTRY_POINTS[command], arg=arg, heavy=HEAVY_MODULES
+    )
+    result = _run("-c", script)
+
+    assert result.stdout
+    assert result.stderr.strip() == ""
+
+
+def _cumulative_import_us(module: str) -> int:
+    """Parse `python -X importtime` for the module's cumulative time."""
+    result = _run("-X", "importtime", "-c", f"import {module}")
+    for line in result.stderr.splitlines():
+        _self, cumulative, name = line.split("|")
+        if name.strip() == module:
+            return int(cumulative)
+    raise AssertionError(f"{module} not found in importtime output")
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("command", sorted(ENTRY_POINTS))
+def test_import_time_budget(command):
+    best_us = min(
+        _cumulative_import_us(ENTRY_POINTS[command]) for _ in range(5)
+    )
+    best_ms = best_us / 1000
+    print(f"\n{command}: {best_ms:0.1f}ms")
+    assert best_ms <= IMPORT_BUDGET_MS[command]
@@ -1,8 +1,11 @@
 from unittest.mock import patch
 
 import pytest
+import requests
+from requests_mock import ANY as ANY_URL
 
 from der_py import __main__
+from der_py.clients import page_buffer
 
 
 def test_main_succeeds(runner, mock_wiki_get):
@@ -41,3 +44,49 @@ def test_main_uses_specified_language(runner):
 def test_main_succeeds_in_production_env(runner):
     result = runner.invoke(__main__.main)
     assert result.exit_code == 0
+
+
+def test_main_prints_count_pages(runner, mock_wiki_get):
+    result = runner.invoke(__main__.main, ["--count=3"])
+    assert result.exit_code == 0
+    assert result.output.count("Lorem Ipsum") == 3
+
+
+def test_main_count_keeps_going_on_errors(runner, requests_mock):
+    requests_mock.get(
+        ANY_URL,
+        [
+            {"exc": requests.RequestException},
+            {"json": {"title": "Lorem Ipsum", "extract": "Lorem ipsum"}},
+        ],
+    )
+    result = runner.invoke(__main__.main, ["-n", "2", "-c", "1"])
+    assert "Lorem Ipsum" in result.output
+    assert "1 of 2 page(s) failed" in result.stderr
+    assert result.exit_code == 1
+
+
+def test_main_buffer_pops_pages_and_schedules_refill(runner, mock_wiki_get):
+    with patch("der_py.clients.page_buffer.spawn_refill") as spawn_refill:
+        result = runner.invoke(__main__.main, ["--refill-buffer", "-l", "de"])
+        assert result.exit_code == 0
+        assert mock_wiki_get.call_count == page_buffer.BUFFER_SIZE
+        assert result.output == ""
+
+        result = runner.invoke(
+            __main__.main, ["--buffer", "-l", "de", "-n", "15"]
+        )
+        assert result.exit_code == 0
+        assert result.output.count("Lorem Ipsum") == 15
+        assert mock_wiki_get.call_count == page_buffer.BUFFER_SIZE
+        spawn_refill.assert_called_once_with("de", page_buffer.BUFFER_SIZE)
+
+
+def test_main_buffer_falls_back_to_live_fetch(runner, mock_wiki_get):
+    with patch("der_py.clients.page_buffer.spawn_refill") as spawn_refill:
+        result = runner.invoke(__main__.main, ["--buffer"])
+
+    assert result.exit_code == 0
+    assert "Lorem Ipsum" in result.output
+    assert mock_wiki_get.call_count == 1
+    spawn_refill.assert_called_once_with("en", page_buffer.BUFFER_SIZE)